@@ -1,5 +1,35 @@
-"""Agents package for Market Research GPT."""
+"""Agents package for Market Research GPT.
 
-from agents.graph import research_graph, build_research_graph
+The compiled graph and its LLM/LangGraph dependencies are loaded on first
+attribute access, not at package import.
+"""
 
-__all__ = ["research_graph", "build_research_graph"]
+import importlib
+
+_EXPORTS = {
+    "research_graph": "agents.graph",
+    "build_research_graph": "agents.graph",
+    "get_research_graph": "agents.graph",
+    "stream_research": "agents.report_cache",
+    "astream_research": "agents.report_cache",
+    "get_job_service": "agents.jobs",
+    "JobRejected": "agents.jobs",
+    "initial_state": "agents.state",
+}
+
+__all__ = [
+    "research_graph",
+    "build_research_graph",
+    "get_research_graph",
+    "stream_research",
+    "astream_research",
+    "get_job_service",
+    "JobRejected",
+    "initial_state",
+]
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,225 @@
+"""
+Writer Context Packer
+
+Builds the writer's user message under a token budget instead of fixed
+character cuts.  The query and writer instructions always go in; the rest of
+the budget is shared between PDF passages, PDF tables and web search
+snippets, which compete on priority × relevance to the query:
+
+  - Budget:     min(config.WRITER_CONTEXT_TOKENS, the room left in
+                config.WRITER_CONTEXT_WINDOW after the system prompt and
+                config.WRITER_MAX_TOKENS of output).
+  - Shares:     when both PDFs and search results are present, PDF content
+                gets config.WRITER_PDF_SHARE of the budget and search the
+                rest; whatever one side leaves unused goes to the other.
+  - Relevance:  one BM25 pass (utils.retrieval) over every candidate; search
+                results also carry Tavily's own score.
+  - Packing:    highest value first.  An item that no longer fits is cut
+                down to the room left (if at least config.WRITER_MIN_ITEM_TOKENS),
+                otherwise dropped — so the lowest-value items go first.
+                Search snippets are capped at config.WRITER_SNIPPET_MAX_TOKENS.
+
+Tokens are counted with utils.tokens (tiktoken when available).
+"""
+
+import logging
+import re
+
+import config
+from utils.retrieval import BM25Index, chunk_document
+from utils.tokens import count_tokens, truncate_tokens
+
+logger = logging.getLogger(__name__)
+
+# Per-kind weight applied to relevance: tables hold the densest figures
+_PRIORITY = {"table": 1.0, "pdf": 0.9, "search": 0.8}
+_INSTRUCTIONS_MAX_TOKENS = 500
+_SECTION_SEPARATOR = "\n\n---\n\n"
+_TABLES_SECTION = "\n\n---\n# Extracted Tables\n\n"  # As written by pdf_agent_node
+_FILE_HEADER_RE = re.compile(r"^## 📄 (.+)$", re.MULTILINE)
+_TABLE_HEADER_RE = re.compile(r"^### Tables from (.+)$", re.MULTILINE)
+_MESSAGE_OVERHEAD_TOKENS = 16  # Chat formatting around the two messages
+
+NO_RESEARCH_NOTE = (
+    "## Note\nNo PDF content or web search results were available. "
+    "Please provide your best analysis based on your training knowledge, "
+    "and clearly indicate when information is from your general knowledge."
+)
+
+
+def context_budget(system_prompt: str) -> int:
+    """Tokens available for the writer's user message."""
+    room = (
+        config.WRITER_CONTEXT_WINDOW
+        - config.WRITER_MAX_TOKENS
+        - count_tokens(system_prompt)
+        - _MESSAGE_OVERHEAD_TOKENS
+    )
+    return max(0, min(config.WRITER_CONTEXT_TOKENS, room))
+
+
+# ── Candidates ────────────────────────────────────────────────────────────────
+
+
+def _sections(text: str, header_re: re.Pattern, default_name: str) -> list[tuple[str, str]]:
+    """Split `text` on `header_re` lines into (name, body) pairs."""
+    parts = header_re.split(text)
+    sections = [(default_name, parts[0].strip())] if parts[0].strip() else []
+    sections.extend(
+        (parts[i].strip(), parts[i + 1].strip()) for i in range(1, len(parts) - 1, 2)
+    )
+    return [(name, body) for name, body in sections if body]
+
+
+def _pdf_items(pdf_content: str) -> list[dict]:
+    """Page-anchored passages and tables from the PDF agent's output."""
+    text_part, _, tables_part = pdf_content.partition(_TABLES_SECTION)
+    items: list[dict] = []
+    for name, body in _sections(text_part, _FILE_HEADER_RE, "Uploaded PDF"):
+        for chunk in chunk_document(body, [], overlap_chars=0):
+            items.append({"kind": "pdf", "source": name, "text": chunk["text"]})
+    for name, body in _sections(tables_part, _TABLE_HEADER_RE, "Uploaded PDF"):
+        for table in re.split(r"\n\n(?=\*\*Table )", body):
+            items.append({"kind": "table", "source": name, "text": table.strip()})
+    return items
+
+
+def _search_items(search_results: list[dict]) -> list[dict]:
+    items = []
+    for r in search_results:
+        header = f"**{r.get('title', 'Untitled')}**\n   URL: {r.get('url', 'N/A')}\n   "
+        content = truncate_tokens(r.get("content", ""), config.WRITER_SNIPPET_MAX_TOKENS)
+        items.append({
+            "kind": "search",
+            "header": header,
+            "text": content,
+            "score": float(r.get("score") or 0.0),
+        })
+    return items
+
+
+def _score(items: list[dict], query: str) -> None:
+    """Set each item's "value" from BM25 relevance (and Tavily score) × priority."""
+    if not items:
+        return
+    scores = BM25Index(
+        [{"text": item.get("header", "") + item["text"]} for item in items]
+    ).scores(query)
+    best: dict[str, float] = {}
+    for item, score in zip(items, scores):
+        best[item["kind"]] = max(best.get(item["kind"], 0.0), float(score))
+    for order, (item, score) in enumerate(zip(items, scores)):
+        relevance = float(score) / best[item["kind"]] if best[item["kind"]] > 0 else 0.0
+        if item["kind"] == "search":
+            relevance = (relevance + min(item["score"], 1.0)) / 2
+        item["order"] = order
+        # Relevance dominates; unmatched items keep a floor so the lead survives
+        item["value"] = _PRIORITY[item["kind"]] * (0.2 + 0.8 * relevance)
+        item["tokens"] = count_tokens(item.get("header", "") + item["text"])
+
+
+# ── Packing ───────────────────────────────────────────────────────────────────
+
+
+def _fill(items: list[dict], budget: int) -> int:
+    """
+    Greedily mark the most valuable unpicked items as picked within `budget`,
+    compressing the first that overflows.  Returns tokens used.
+    """
+    used = 0
+    for item in sorted(items, key=lambda i: (-i["value"], i["order"])):
+        if item.get("picked"):
+            continue
+        room = budget - used
+        if item["tokens"] <= room:
+            item["picked"] = True
+            used += item["tokens"]
+            continue
+        fixed = count_tokens(item.get("header", ""))
+        if room - fixed >= config.WRITER_MIN_ITEM_TOKENS:
+            item["text"] = truncate_tokens(item["text"], room - fixed)
+            item["tokens"] = count_tokens(item.get("header", "") + item["text"])
+            item["picked"] = True
+            used += item["tokens"]
+    return used
+
+
+def _render_pdf(items: list[dict]) -> str:
+    picked = [i for i in items if i.get("picked")]
+    by_source: dict[str, list[str]] = {}
+    tables: list[str] = []
+    for item in sorted(picked, key=lambda i: i["order"]):
+        if item["kind"] == "pdf":
+            by_source.setdefault(item["source"], []).append(item["text"])
+        else:
+            tables.append(f"### Tables from {item['source']}\n{item['text']}")
+
+    parts = [f"## 📄 {name}\n\n" + "\n\n".join(texts) for name, texts in by_source.items()]
+    if tables:
+        parts.append("# Extracted Tables\n\n" + "\n\n".join(tables))
+    dropped = len(items) - len(picked)
+    if dropped:
+        parts.append(f"[... {dropped} lower-relevance PDF passage(s) omitted for length ...]")
+    return "## Extracted PDF Content\n" + "\n\n".join(parts)
+
+
+def _render_search(items: list[dict]) -> str:
+    picked = sorted((i for i in items if i.get("picked")), key=lambda i: -i["value"])
+    lines = [f"{n}. {item['header']}{item['text']}\n" for n, item in enumerate(picked, 1)]
+    return "## Web Search Results\n" + "\n".join(lines)
+
+
+def pack_writer_context(
+    query: str,
+    plan: dict,
+    pdf_content: str,
+    search_results: list[dict],
+    budget: int,
+) -> str:
+    """
+    Build the writer's user message within `budget` tokens.
+
+    Returns:
+        Markdown sections (query, instructions, PDF content, web search
+        results) joined by horizontal rules.
+    """
+    sections = [f"## Research Query\n{query}"]
+    if plan.get("writer_instructions"):
+        instructions = truncate_tokens(plan["writer_instructions"], _INSTRUCTIONS_MAX_TOKENS)
+        sections.append(f"## Special Instructions\n{instructions}")
+
+    if not pdf_content and not search_results:
+        sections.append(NO_RESEARCH_NOTE)
+        return _SECTION_SEPARATOR.join(sections)
+
+    pdf_items = _pdf_items(pdf_content) if pdf_content else []
+    search_items = _search_items(search_results)
+    relevance_query = " ".join(
+        part for part in (query, plan.get("pdf_instructions", ""), plan.get("writer_instructions", ""))
+        if part
+    )
+    _score(pdf_items + search_items, relevance_query)
+
+    # Section headers, separators and numbering are small; reserve for them up front
+    remaining = max(0, budget - count_tokens(_SECTION_SEPARATOR.join(sections)) - 64)
+    pdf_share = int(remaining * config.WRITER_PDF_SHARE) if pdf_items and search_items else remaining
+    used = _fill(pdf_items, pdf_share) if pdf_items else 0
+    used += _fill(search_items, remaining - used)
+    if pdf_items:
+        used += _fill(pdf_items, remaining - used)  # Room search didn't need
+
+    if pdf_items:
+        sections.append(_render_pdf(pdf_items))
+    if any(i.get("picked") for i in search_items):
+        sections.append(_render_search(search_items))
+
+    logger.info(
+        "Writer context: %d/%d tokens; kept %d/%d PDF items, %d/%d search results",
+        used,
+        budget,
+        sum(1 for i in pdf_items if i.get("picked")),
+        len(pdf_items),
+        sum(1 for i in search_items if i.get("picked")),
+        len(search_items),
+    )
+    return _SECTION_SEPARATOR.join(sections)
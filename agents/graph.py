@@ -3,62 +3,94 @@ LangGraph State Graph
 
 Wires the agent nodes into a LangGraph StateGraph with conditional routing:
 
-  START → planner → [conditional] → pdf_agent / search_agent → aggregator → writer → END
+  START → speculative_search → planner → [conditional fan-out]
+        → pdf_agent ∥ search_agent → writer → END
 
 The planner decides which sub-agents to invoke.  If both are needed, they run
-sequentially (pdf first, then search) to keep state merges simple.
+in parallel in the same super-step and join at the writer; the `status`
+reducer in AgentState merges their concurrent updates.  The speculative step
+only starts a background search for the raw query and returns at once, so
+that Tavily round-trip overlaps with the planner's LLM call.
+
+Every node is wrapped by utils.metrics.instrument_node, which records its
+timings and counters into state["metrics"].
+
+Each node has a sync and an async implementation: `.invoke()` / `.stream()`
+run the sync ones on LangGraph's thread pool, while `.ainvoke()` /
+`.astream()` run the async ones, so many sessions can share one event loop
+without a thread parked per in-flight LLM or Tavily request.
 """
 
 import logging
+import threading
 
+from typing import Awaitable, Callable
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 
 from agents.state import AgentState
-from agents.orchestrator import planner_node
-from agents.pdf_agent import pdf_agent_node
-from agents.search_agent import search_agent_node
-from agents.writer_agent import writer_node
+from agents.orchestrator import aplanner_node, planner_node
+from agents.pdf_agent import apdf_agent_node, pdf_agent_node
+from agents.search_agent import (
+    asearch_agent_node,
+    aspeculative_search_node,
+    search_agent_node,
+    speculative_search_node,
+)
+from agents.writer_agent import awriter_node, writer_node
+from utils.metrics import instrument_node
 
 logger = logging.getLogger(__name__)
 
 
-def _route_after_plan(state: dict) -> str:
-    """Decide which agent to invoke first based on the plan."""
+def _route_after_plan(state: dict) -> list[str]:
+    """Decide which agents to fan out to based on the plan."""
     plan = state.get("plan", {})
+    targets: list[str] = []
     if plan.get("use_pdf_agent"):
-        return "pdf_agent"
-    elif plan.get("use_search_agent"):
-        return "search_agent"
-    else:
-        return "writer"
-
-
-def _route_after_pdf(state: dict) -> str:
-    """After PDF extraction, go to search if needed, otherwise to writer."""
-    plan = state.get("plan", {})
+        targets.append("pdf_agent")
     if plan.get("use_search_agent"):
-        return "search_agent"
-    return "writer"
+        targets.append("search_agent")
+    return targets or ["writer"]
+
+
+def make_node(
+    name: str,
+    fn: Callable[[dict], dict],
+    afn: Callable[[dict], Awaitable[dict]],
+) -> RunnableLambda:
+    """An instrumented graph node with sync and async implementations."""
+    return RunnableLambda(
+        instrument_node(name, fn), afunc=instrument_node(name, afn), name=name
+    )
 
 
 def build_research_graph() -> StateGraph:
     """
     Construct and compile the LangGraph research pipeline.
 
-    Returns a compiled StateGraph ready for `.invoke()` or `.stream()`.
+    Returns a compiled StateGraph ready for `.invoke()` / `.stream()` or
+    `.ainvoke()` / `.astream()`.
     """
     graph = StateGraph(AgentState)
 
     # ── Add nodes ─────────────────────────────────────────────────────────
-    graph.add_node("planner", planner_node)
-    graph.add_node("pdf_agent", pdf_agent_node)
-    graph.add_node("search_agent", search_agent_node)
-    graph.add_node("writer", writer_node)
+    nodes = {
+        "speculative_search": (speculative_search_node, aspeculative_search_node),
+        "planner": (planner_node, aplanner_node),
+        "pdf_agent": (pdf_agent_node, apdf_agent_node),
+        "search_agent": (search_agent_node, asearch_agent_node),
+        "writer": (writer_node, awriter_node),
+    }
+    for name, (fn, afn) in nodes.items():
+        graph.add_node(name, make_node(name, fn, afn))
 
     # ── Entry point ───────────────────────────────────────────────────────
-    graph.set_entry_point("planner")
+    graph.set_entry_point("speculative_search")
+    graph.add_edge("speculative_search", "planner")
 
-    # ── Conditional edges after planner ───────────────────────────────────
+    # ── Conditional fan-out after planner ─────────────────────────────────
     graph.add_conditional_edges(
         "planner",
         _route_after_plan,
@@ -69,17 +101,8 @@ def build_research_graph() -> StateGraph:
         },
     )
 
-    # ── Conditional edges after PDF agent ─────────────────────────────────
-    graph.add_conditional_edges(
-        "pdf_agent",
-        _route_after_pdf,
-        {
-            "search_agent": "search_agent",
-            "writer": "writer",
-        },
-    )
-
-    # ── Search agent always goes to writer ────────────────────────────────
+    # ── Both branches join at the writer ──────────────────────────────────
+    graph.add_edge("pdf_agent", "writer")
     graph.add_edge("search_agent", "writer")
 
     # ── Writer goes to END ────────────────────────────────────────────────
@@ -88,5 +111,21 @@ def build_research_graph() -> StateGraph:
     return graph.compile()
 
 
-# Pre-built graph instance
-research_graph = build_research_graph()
+_research_graph = None
+_research_graph_lock = threading.Lock()
+
+
+def get_research_graph():
+    """Return the shared compiled graph, building it on first use."""
+    global _research_graph
+    with _research_graph_lock:
+        if _research_graph is None:
+            _research_graph = build_research_graph()
+        return _research_graph
+
+
+def __getattr__(name: str):
+    # `research_graph` stays importable but is only compiled when first used
+    if name == "research_graph":
+        return get_research_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
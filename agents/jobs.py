@@ -0,0 +1,287 @@
+"""
+Research Job Service
+
+Runs research requests on a bounded worker pool instead of on the caller's
+thread, so the Streamlit app (and headless callers) submit a job and poll its
+progress rather than blocking on the graph.
+
+  - Admission:  at most config.JOB_MAX_QUEUED jobs wait; further submissions
+                are rejected with JobRejected.
+  - Fairness:   each user runs at most config.JOB_MAX_RUNNING_PER_USER jobs
+                at once; a free worker takes the oldest queued job of the
+                user with the fewest jobs running.
+  - Progress:   `get(job_id)` returns a snapshot with the agent status, the
+                node last heard from, metrics and the report streamed so far.
+  - Cancel:     queued jobs are dropped; running jobs stop at the next graph
+                event (the node in flight finishes, nothing after it runs).
+
+Jobs run through `stream_research`, so stored reports are served from the
+report cache as usual.
+"""
+
+import copy
+import itertools
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import config
+from agents.report_cache import stream_research
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = frozenset({SUCCEEDED, FAILED, CANCELLED})
+
+
+class JobRejected(RuntimeError):
+    """Raised by `submit` when the admission queue is full."""
+
+
+class ResearchJob:
+    """One research request and its progress."""
+
+    _seq = itertools.count()
+
+    def __init__(self, initial_state: dict, user_id: str):
+        self.job_id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.initial_state = initial_state
+        self.seq = next(self._seq)
+        self.state = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.current_node: Optional[str] = None
+        self.status: dict = {}
+        self.metrics: dict = {}
+        self.report_parts: list[str] = []
+        self.report = ""
+        self.error: Optional[str] = None
+        self.cancel_requested = threading.Event()
+        self.done = threading.Event()
+
+    def snapshot(self, position: Optional[int] = None) -> dict:
+        """Plain-dict copy of the job's progress, safe to hand to other threads."""
+        return {
+            "job_id": self.job_id,
+            "user_id": self.user_id,
+            "query": self.initial_state.get("query", ""),
+            "state": self.state,
+            "queue_position": position,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "current_node": self.current_node,
+            "status": dict(self.status),
+            "metrics": copy.deepcopy(self.metrics),
+            "report": self.report or "".join(self.report_parts),
+            "error": self.error,
+        }
+
+
+class ResearchJobService:
+    """Bounded, fair executor of research jobs."""
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        max_running_per_user: Optional[int] = None,
+        history_entries: Optional[int] = None,
+    ):
+        self.max_workers = max_workers or config.JOB_MAX_WORKERS
+        self.max_queued = max_queued or config.JOB_MAX_QUEUED
+        self.max_running_per_user = max_running_per_user or config.JOB_MAX_RUNNING_PER_USER
+        self.history_entries = history_entries or config.JOB_HISTORY_MAX_ENTRIES
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="research-job"
+        )
+        self._jobs: dict[str, ResearchJob] = {}
+        self._queue: deque[ResearchJob] = deque()
+        self._running: defaultdict[str, int] = defaultdict(int)
+        self._running_total = 0
+        self._lock = threading.Lock()
+
+    # ── Public API ────────────────────────────────────────────────────────
+
+    def submit(self, initial_state: dict, user_id: str = "anonymous") -> str:
+        """
+        Queue a research run.
+
+        Args:
+            initial_state: AgentState to start from (see agents.state.initial_state).
+            user_id: Caller identity used for the per-user concurrency limit.
+
+        Returns:
+            The job id.
+
+        Raises:
+            JobRejected: The admission queue is full.
+        """
+        job = ResearchJob(initial_state, user_id)
+        with self._lock:
+            if len(self._queue) >= self.max_queued:
+                raise JobRejected(
+                    f"Research queue is full ({self.max_queued} waiting); try again shortly"
+                )
+            self._jobs[job.job_id] = job
+            self._queue.append(job)
+            self._dispatch()
+        logger.info("Queued job %s for user %s", job.job_id[:8], user_id)
+        return job.job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Progress snapshot of a job, or None if unknown (or evicted)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            return job.snapshot(self._position(job))
+
+    def list_jobs(self, user_id: Optional[str] = None) -> list[dict]:
+        """Snapshots of known jobs, oldest first, optionally for one user."""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.seq)
+            return [
+                job.snapshot(self._position(job))
+                for job in jobs
+                if user_id is None or job.user_id == user_id
+            ]
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[dict]:
+        """Block until a job finishes (or `timeout` passes); returns its snapshot."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        job.done.wait(timeout)
+        return self.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a job.  Returns False if it is unknown or already finished.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED_STATES:
+                return False
+            job.cancel_requested.set()
+            if job.state == QUEUED:
+                self._queue.remove(job)
+                self._finish(job, CANCELLED)
+        logger.info("Cancellation requested for job %s", job_id[:8])
+        return True
+
+    def shutdown(self, cancel: bool = True) -> None:
+        """Stop accepting work; optionally cancel everything queued or running."""
+        if cancel:
+            with self._lock:
+                pending = [j.job_id for j in self._jobs.values() if j.state not in FINISHED_STATES]
+            for job_id in pending:
+                self.cancel(job_id)
+        self._pool.shutdown(wait=True)
+
+    # ── Internal helpers ──────────────────────────────────────────────────
+
+    def _position(self, job: ResearchJob) -> Optional[int]:
+        # Caller holds self._lock
+        if job.state != QUEUED:
+            return None
+        return self._queue.index(job) + 1
+
+    def _dispatch(self) -> None:
+        # Caller holds self._lock
+        while self._running_total < self.max_workers and self._queue:
+            eligible = [
+                job for job in self._queue
+                if self._running[job.user_id] < self.max_running_per_user
+            ]
+            if not eligible:
+                return
+            job = min(eligible, key=lambda j: (self._running[j.user_id], j.seq))
+            self._queue.remove(job)
+            self._running[job.user_id] += 1
+            self._running_total += 1
+            job.state = RUNNING
+            job.started_at = time.time()
+            self._pool.submit(self._run, job)
+
+    def _run(self, job: ResearchJob) -> None:
+        outcome = SUCCEEDED
+        stream = stream_research(job.initial_state)
+        try:
+            for mode, chunk in stream:
+                if job.cancel_requested.is_set():
+                    outcome = CANCELLED
+                    break
+                self._record(job, mode, chunk)
+            if job.cancel_requested.is_set():
+                outcome = CANCELLED
+        except Exception as e:
+            logger.error("Job %s failed: %s", job.job_id[:8], e, exc_info=True)
+            job.error = str(e)
+            outcome = FAILED
+        finally:
+            stream.close()  # Stops the graph if we broke out early
+            with self._lock:
+                self._running[job.user_id] -= 1
+                self._running_total -= 1
+                self._finish(job, outcome)
+                self._dispatch()
+
+    def _record(self, job: ResearchJob, mode: str, chunk: dict) -> None:
+        with self._lock:
+            if mode == "custom":
+                # Writer tokens: {"node": "writer", "token": str}
+                if chunk.get("token"):
+                    job.report_parts.append(chunk["token"])
+                return
+            # Each update step is {node_name: state_update}
+            for node_name, update in chunk.items():
+                job.current_node = node_name
+                if not update:
+                    continue
+                job.status.update(update.get("status", {}))
+                job.metrics.update(update.get("metrics", {}))
+                if update.get("report"):
+                    job.report = update["report"]
+
+    def _finish(self, job: ResearchJob, outcome: str) -> None:
+        # Caller holds self._lock
+        job.state = outcome
+        job.finished_at = time.time()
+        job.done.set()
+        logger.info("Job %s %s", job.job_id[:8], outcome)
+        self._evict()
+
+    def _evict(self) -> None:
+        # Caller holds self._lock; only finished jobs are forgotten
+        finished = sorted(
+            (j for j in self._jobs.values() if j.state in FINISHED_STATES),
+            key=lambda j: j.finished_at or 0,
+        )
+        for job in finished[: max(0, len(finished) - self.history_entries)]:
+            del self._jobs[job.job_id]
+
+
+_default_service: Optional[ResearchJobService] = None
+_default_lock = threading.Lock()
+
+
+def get_job_service() -> ResearchJobService:
+    """Return the process-wide ResearchJobService instance."""
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = ResearchJobService()
+        return _default_service
@@ -0,0 +1,144 @@
+"""
+Shared LLM Client Factory
+
+Nodes ask `get_llm()` for a chat model instead of constructing ChatOpenAI on
+every call.  Clients are cached per (model, temperature, max_tokens) and all
+share one pooled, keep-alive httpx client, so repeated node runs and
+concurrent sessions reuse connections instead of paying a fresh TLS handshake.
+
+Async nodes use `get_async_llm()` instead.  An httpx.AsyncClient's pool is
+tied to the event loop it was first used on, so async clients are cached per
+running loop and dropped with it.
+"""
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import TYPE_CHECKING, Optional
+
+import config
+
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+_clients: dict[tuple, "ChatOpenAI"] = {}
+_lock = threading.Lock()
+_http_client: Optional["httpx.Client"] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _shared_http_client() -> "httpx.Client":
+    # Caller holds _lock
+    global _http_client
+    if _http_client is None:
+        import httpx
+
+        _http_client = httpx.Client(**_http_limits())
+    return _http_client
+
+
+def _http_limits() -> dict:
+    import httpx
+
+    return {
+        "limits": httpx.Limits(
+            max_connections=config.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=config.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        "timeout": httpx.Timeout(config.LLM_TIMEOUT),
+    }
+
+
+def get_llm(
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+) -> "ChatOpenAI":
+    """
+    Return a shared ChatOpenAI client.
+
+    Args:
+        model: Model name (default from config.LLM_MODEL).
+        temperature: Sampling temperature (default from config.LLM_TEMPERATURE).
+        max_tokens: Output token cap (default: provider default).
+
+    Clients are safe to use from several threads at once.
+    """
+    model = model or config.LLM_MODEL
+    temperature = config.LLM_TEMPERATURE if temperature is None else temperature
+    key = (model, temperature, max_tokens)
+
+    with _lock:
+        llm = _clients.get(key)
+        if llm is None:
+            # Deferred: langchain_openai is slow to import
+            from langchain_openai import ChatOpenAI
+
+            llm = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                api_key=config.OPENAI_API_KEY,
+                max_tokens=max_tokens,
+                stream_usage=True,  # Token counts on streamed responses (utils.metrics)
+                http_client=_shared_http_client(),
+            )
+            _clients[key] = llm
+            logger.debug("Created LLM client for %s", key)
+        return llm
+
+
+def get_async_llm(
+    model: Optional[str] = None,
+    temperature: Optional[float] = None,
+    max_tokens: Optional[int] = None,
+) -> "ChatOpenAI":
+    """
+    Return a ChatOpenAI client for `ainvoke` / `astream` on the running loop.
+
+    Same arguments as `get_llm`.  Must be called from a coroutine; clients on
+    one loop share one pooled httpx.AsyncClient.
+    """
+    loop = asyncio.get_running_loop()
+    model = model or config.LLM_MODEL
+    temperature = config.LLM_TEMPERATURE if temperature is None else temperature
+    key = (model, temperature, max_tokens)
+
+    with _lock:
+        per_loop = _async_clients.setdefault(loop, {})
+        llm = per_loop.get(key)
+        if llm is None:
+            import httpx
+            from langchain_openai import ChatOpenAI
+
+            if "http" not in per_loop:
+                per_loop["http"] = httpx.AsyncClient(**_http_limits())
+            llm = ChatOpenAI(
+                model=model,
+                temperature=temperature,
+                api_key=config.OPENAI_API_KEY,
+                max_tokens=max_tokens,
+                http_client=_shared_http_client(),
+                http_async_client=per_loop["http"],
+                stream_usage=True,
+            )
+            per_loop[key] = llm
+            logger.debug("Created async LLM client for %s", key)
+        return llm
+
+
+def reset_llm_clients() -> None:
+    """Drop cached clients and close the shared connection pool."""
+    global _http_client
+    with _lock:
+        _clients.clear()
+        # Async pools can only be closed on their own loop; drop them instead
+        _async_clients.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
@@ -3,15 +3,26 @@ Orchestrator / Planner Agent
 
 Uses an LLM to decompose the user's research query into a structured plan
 that specifies which sub-agents should be invoked and with what parameters.
+Common query shapes are planned by a local rule-based router instead, which
+skips the LLM round-trip when it is confident.  Bulk callers can plan many
+queries at once with `plan_many`, which packs the ones that still need the
+LLM into shared planner requests.
 """
 
+import asyncio
+import copy
 import json
 import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
 
 import config
+from agents.llm import get_async_llm, get_llm
+from agents.plan_cache import PlanCache, get_plan_cache, normalize_query
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -36,68 +47,466 @@ Rules:
 - Keep instructions concise and actionable.
 """
 
+BATCH_PLANNER_SYSTEM_PROMPT = PLANNER_SYSTEM_PROMPT + """
+You will receive several numbered research requests at once.  Plan each one
+independently, following the rules above, and respond with a JSON array (no
+markdown fences) holding one plan object per request, in order.  Add to each
+plan an "index" field set to the request's number and a "query" field that
+repeats the request's research query exactly.
+"""
 
-def planner_node(state: dict) -> dict:
+_REQUIRED_PLAN_KEYS = ("use_pdf_agent", "use_search_agent")
+
+
+# ── Fast-path router ──────────────────────────────────────────────────────────
+# Most plans are predictable from the query's shape: PDFs present → PDF agent,
+# time-sensitive wording → web search.  The LLM planner is only consulted when
+# these rules are not confident.
+
+_TIME_SENSITIVE_RE = re.compile(
+    r"\b(latest|current(ly)?|today|now|recent(ly)?|this (week|month|quarter|year)|"
+    r"news|outlook|forecast|prices?|stock|shares|trading|market cap|guidance|"
+    r"20[2-3]\d|q[1-4])\b",
+    re.IGNORECASE,
+)
+_DOC_REFERENCE_RE = re.compile(
+    r"\b(this|the|these|attached|uploaded)\s+(documents?|reports?|filings?|pdfs?|files?|"
+    r"decks?|10-[kq]s?|presentations?|transcripts?)\b|"
+    r"\b(summari[sz]e|according to)\b",
+    re.IGNORECASE,
+)
+_COMPLEX_RE = re.compile(
+    r"\b(compare|comparison|versus|vs\.?|relative to|trade-?offs?|why|scenarios?)\b",
+    re.IGNORECASE,
+)
+
+# Metrics counter bumped per plan source; LLM plans already show as llm_calls
+_SOURCE_COUNTERS = {
+    "cache": "plan_cache_hits",
+    "fast": "fast_plans",
+    "llm_fallback": "plan_fallbacks",
+}
+
+
+def _default_plan(query: str, uploaded_files: list[dict]) -> dict:
+    """Plan used when the LLM planner's output cannot be parsed."""
+    return {
+        "goal": query,
+        "use_pdf_agent": bool(uploaded_files),
+        "pdf_instructions": "Extract all relevant content",
+        "use_search_agent": True,
+        "search_queries": [query],
+        "writer_instructions": "Write a comprehensive financial analysis",
+    }
+
+
+def fast_plan(query: str, uploaded_files: list[dict]) -> tuple[dict, float]:
     """
-    LangGraph node: analyse the query and produce an execution plan.
+    Build a plan with local rules instead of an LLM call.
 
-    Reads: query, uploaded_files
-    Writes: plan, status
+    Returns:
+        (plan, confidence) — the plan follows the LLM planner's schema;
+        confidence is in [0, 1].
     """
-    query = state.get("query", "")
-    uploaded_files = state.get("uploaded_files", [])
+    has_pdfs = bool(uploaded_files)
+    time_sensitive = bool(_TIME_SENSITIVE_RE.search(query))
+    doc_reference = bool(_DOC_REFERENCE_RE.search(query))
 
-    llm = ChatOpenAI(
-        model=config.LLM_MODEL,
-        temperature=config.LLM_TEMPERATURE,
-        api_key=config.OPENAI_API_KEY,
-    )
+    confidence = 0.9
+    if len(query.split()) > 30:
+        confidence -= 0.3  # Long, multi-part asks deserve real decomposition
+    if _COMPLEX_RE.search(query):
+        confidence -= 0.3  # Comparisons benefit from several search angles
+    if has_pdfs and not (doc_reference or time_sensitive):
+        confidence -= 0.3  # Unclear whether the web adds anything to the PDFs
 
-    user_content = f"Research query: {query}\n\n"
-    if uploaded_files:
-        file_names = [f["name"] for f in uploaded_files]
-        user_content += f"Uploaded PDF files: {', '.join(file_names)}\n"
-    else:
-        user_content += "No PDF files uploaded.\n"
+    use_search = not has_pdfs or time_sensitive or not doc_reference
 
-    messages = [
-        SystemMessage(content=PLANNER_SYSTEM_PROMPT),
-        HumanMessage(content=user_content),
-    ]
+    plan = {
+        "goal": query,
+        "use_pdf_agent": has_pdfs,
+        "pdf_instructions": f"Extract content relevant to: {query}" if has_pdfs else "",
+        "use_search_agent": use_search,
+        "search_queries": [query] if use_search else [],
+        "writer_instructions": "Write a comprehensive financial analysis",
+    }
+    return plan, max(0.0, min(1.0, confidence))
+
+
+# ── LLM planner ───────────────────────────────────────────────────────────────
 
-    response = llm.invoke(messages)
 
-    # Parse the JSON plan
+def _parse_plan(content: str) -> Optional[dict]:
+    """Parse the planner's JSON reply, tolerating markdown fences."""
     try:
-        plan = json.loads(response.content.strip())
+        return json.loads(content.strip())
     except json.JSONDecodeError:
         # Fallback: try to extract JSON from markdown fences
-        text = response.content.strip()
+        text = content.strip()
         if "```" in text:
             text = text.split("```")[1]
             if text.startswith("json"):
                 text = text[4:]
             text = text.strip()
         try:
-            plan = json.loads(text)
+            return json.loads(text)
         except json.JSONDecodeError:
-            logger.error("Planner returned invalid JSON: %s", response.content)
-            plan = {
-                "goal": query,
-                "use_pdf_agent": bool(uploaded_files),
-                "pdf_instructions": "Extract all relevant content",
-                "use_search_agent": True,
-                "search_queries": [query],
-                "writer_instructions": "Write a comprehensive financial analysis",
-            }
+            return None
+
+
+def _planner_request(query: str, uploaded_files: list[dict]) -> str:
+    user_content = f"Research query: {query}\n\n"
+    if uploaded_files:
+        file_names = [f["name"] for f in uploaded_files]
+        user_content += f"Uploaded PDF files: {', '.join(file_names)}\n"
+    else:
+        user_content += "No PDF files uploaded.\n"
+    return user_content
+
+
+def _planner_messages(query: str, uploaded_files: list[dict]) -> list:
+    return [
+        SystemMessage(content=PLANNER_SYSTEM_PROMPT),
+        HumanMessage(content=_planner_request(query, uploaded_files)),
+    ]
+
+
+def _plan_from_response(response, query: str, uploaded_files: list[dict]) -> tuple[dict, str]:
+    metrics.record_llm_usage(response.usage_metadata)
+    plan = _parse_plan(response.content)
+    if plan is None:
+        logger.error("Planner returned invalid JSON: %s", response.content)
+        return _default_plan(query, uploaded_files), "llm_fallback"
+    return plan, "llm"
+
+
+def _llm_plan(query: str, uploaded_files: list[dict]) -> tuple[dict, str]:
+    """Ask the LLM for a plan.  Returns (plan, source)."""
+    response = get_llm().invoke(_planner_messages(query, uploaded_files))
+    return _plan_from_response(response, query, uploaded_files)
+
+
+async def _allm_plan(query: str, uploaded_files: list[dict]) -> tuple[dict, str]:
+    """Async `_llm_plan`."""
+    response = await get_async_llm().ainvoke(_planner_messages(query, uploaded_files))
+    return _plan_from_response(response, query, uploaded_files)
+
+
+# ── Batched LLM planner ───────────────────────────────────────────────────────
+# One request carries up to config.PLANNER_BATCH_SIZE queries, so the system
+# prompt and the round-trip are paid once per batch instead of once per query.
+
+
+def _batch_planner_messages(requests: list[tuple[str, list[dict]]]) -> list:
+    parts = [
+        f"Request {number}:\n{_planner_request(query, uploaded_files)}"
+        for number, (query, uploaded_files) in enumerate(requests, 1)
+    ]
+    return [
+        SystemMessage(content=BATCH_PLANNER_SYSTEM_PROMPT),
+        HumanMessage(content="\n".join(parts)),
+    ]
+
+
+def _json_objects(text: str) -> list:
+    """Every top-level JSON object in `text`, skipping anything malformed."""
+    decoder = json.JSONDecoder()
+    objects = []
+    pos = 0
+    while True:
+        start = text.find("{", pos)
+        if start < 0:
+            return objects
+        try:
+            obj, pos = decoder.raw_decode(text, start)
+        except json.JSONDecodeError:
+            pos = start + 1
+            continue
+        objects.append(obj)
+
+
+def _parse_plans(content: str, queries: list[str]) -> list[Optional[dict]]:
+    """
+    Parse a batched planner reply into one plan per query.
+
+    Each item is parsed on its own, so one malformed or missing plan only
+    costs that request its LLM plan.  A plan is accepted only if the query it
+    echoes matches its request: first the request its 1-based "index" points
+    at, otherwise the one request with that query.  Plans that match nothing
+    are dropped rather than risk handing one request another's plan.
+
+    Returns:
+        One entry per query: the plan dict, or None if it was unusable.
+    """
+    text = content.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.startswith("json"):
+            text = text[4:]
+
+    try:
+        items = json.loads(text)
+    except json.JSONDecodeError:
+        items = _json_objects(text)
+    if isinstance(items, dict):
+        items = items.get("plans", [items])
+    if not isinstance(items, list):
+        items = []
+
+    normalized = [normalize_query(q) for q in queries]
+    plans: list[Optional[dict]] = [None] * len(queries)
+    for item in items:
+        if not (isinstance(item, dict) and all(k in item for k in _REQUIRED_PLAN_KEYS)):
+            continue
+        index = item.pop("index", None)
+        echoed = item.pop("query", None)
+        if not isinstance(echoed, str):
+            continue
+        echoed = normalize_query(echoed)
+
+        slot = None
+        if isinstance(index, int) and 1 <= index <= len(queries) and normalized[index - 1] == echoed:
+            slot = index - 1
+        elif normalized.count(echoed) == 1:
+            slot = normalized.index(echoed)
+        if slot is None or plans[slot] is not None:
+            logger.warning("Discarding batched plan that matches no request: %r", echoed)
+            continue
+        plans[slot] = item
+    return plans
+
+
+def _plans_from_batch_response(
+    response, requests: list[tuple[str, list[dict]]]
+) -> list[tuple[dict, str]]:
+    metrics.record_llm_usage(response.usage_metadata)
+    results = []
+    plans = _parse_plans(response.content, [query for query, _ in requests])
+    for (query, uploaded_files), plan in zip(requests, plans):
+        if plan is None:
+            logger.error("Batched planner returned no usable plan for %r", query)
+            results.append((_default_plan(query, uploaded_files), "llm_fallback"))
+        else:
+            results.append((plan, "llm"))
+    return results
+
+
+def _batches(requests: list) -> list[list]:
+    size = max(1, config.PLANNER_BATCH_SIZE)
+    return [requests[i:i + size] for i in range(0, len(requests), size)]
+
+
+def _failed_batch(requests: list[tuple[str, list[dict]]], error: Exception) -> list[tuple[dict, str]]:
+    """Default plans for a batch whose LLM call failed (they are not cached)."""
+    logger.error("Batched planner call for %d request(s) failed: %s", len(requests), error)
+    return [(_default_plan(query, files), "llm_fallback") for query, files in requests]
+
+
+def _llm_plan_batch(requests: list[tuple[str, list[dict]]]) -> list[tuple[dict, str]]:
+    """Plan several requests with one LLM call.  Returns (plan, source) per request."""
+    try:
+        if len(requests) == 1:
+            return [_llm_plan(*requests[0])]
+        response = get_llm().invoke(_batch_planner_messages(requests))
+        return _plans_from_batch_response(response, requests)
+    except Exception as e:
+        return _failed_batch(requests, e)
+
+
+async def _allm_plan_batch(requests: list[tuple[str, list[dict]]]) -> list[tuple[dict, str]]:
+    """Async `_llm_plan_batch`."""
+    try:
+        if len(requests) == 1:
+            return [await _allm_plan(*requests[0])]
+        response = await get_async_llm().ainvoke(_batch_planner_messages(requests))
+        return _plans_from_batch_response(response, requests)
+    except Exception as e:
+        return _failed_batch(requests, e)
+
+
+def _local_plan(query: str, uploaded_files: list[dict]) -> tuple[Optional[dict], str, Optional[str]]:
+    """
+    Plan without the LLM if possible: plan cache first, then the fast-path
+    router.  Returns (plan or None, source, plan cache key or None).
+    """
+    cache_key = None
+    if config.PLAN_CACHE_ENABLED:
+        cache_key = PlanCache.make_key(query, uploaded_files)
+        plan = get_plan_cache().get(cache_key)
+        if plan is not None:
+            return plan, "cache", cache_key
+
+    if config.FAST_PLANNER_ENABLED:
+        candidate, confidence = fast_plan(query, uploaded_files)
+        if confidence >= config.FAST_PLANNER_MIN_CONFIDENCE:
+            return candidate, "fast", cache_key
+        logger.info("Fast planner confidence %.2f too low; using LLM", confidence)
+
+    return None, "llm", cache_key
+
+
+def _finalize_plan(
+    plan: dict, source: str, uploaded_files: list[dict], cache_key: Optional[str]
+) -> dict:
+    """Cache an LLM plan and record its source."""
+    if source == "llm" and cache_key is not None:
+        get_plan_cache().put(cache_key, plan)
 
     # If no PDFs uploaded, never use pdf agent
     if not uploaded_files:
         plan["use_pdf_agent"] = False
 
-    logger.info("Plan: %s", plan)
+    if source in _SOURCE_COUNTERS:
+        metrics.count(_SOURCE_COUNTERS[source])
+    logger.info("Plan (%s): %s", source, plan)
+    return plan
+
+
+def _planner_update(
+    plan: dict,
+    source: str,
+    uploaded_files: list[dict],
+    cache_key: Optional[str],
+    speculated: bool = False,
+) -> dict:
+    """
+    Finalize a plan and build the node's state update.  `speculated` means a
+    speculative search set the search agent's status, which is replaced if
+    the plan skips search.
+    """
+    plan = _finalize_plan(plan, source, uploaded_files, cache_key)
 
+    label = {
+        "cache": "from cache",
+        "fast": "fast path",
+        "llm": "LLM",
+        "llm_fallback": "default",
+    }[source]
+    status = {"planner": f"✅ Plan created ({label})"}
+    if speculated and not plan.get("use_search_agent"):
+        status["search_agent"] = "⏭️ Web search not needed"
     return {
         "plan": plan,
-        "status": {"planner": "✅ Plan created"},
+        "status": status,
     }
+
+
+def planner_node(state: dict) -> dict:
+    """
+    LangGraph node: analyse the query and produce an execution plan.
+
+    Checks the plan cache, then the local fast-path router, and only calls
+    the LLM planner when the router's confidence is below
+    config.FAST_PLANNER_MIN_CONFIDENCE.  LLM plans are cached.
+
+    Reads: query, uploaded_files
+    Writes: plan, status
+    """
+    query = state.get("query", "")
+    uploaded_files = state.get("uploaded_files", [])
+
+    plan, source, cache_key = _local_plan(query, uploaded_files)
+    if plan is None:
+        plan, source = _llm_plan(query, uploaded_files)
+    return _planner_update(
+        plan, source, uploaded_files, cache_key, bool(state.get("speculative_queries"))
+    )
+
+
+async def aplanner_node(state: dict) -> dict:
+    """Async `planner_node`: the LLM call is awaited instead of holding a thread."""
+    query = state.get("query", "")
+    uploaded_files = state.get("uploaded_files", [])
+
+    plan, source, cache_key = _local_plan(query, uploaded_files)
+    if plan is None:
+        plan, source = await _allm_plan(query, uploaded_files)
+    return _planner_update(
+        plan, source, uploaded_files, cache_key, bool(state.get("speculative_queries"))
+    )
+
+
+# ── Bulk planning ─────────────────────────────────────────────────────────────
+
+
+def _plan_many_local(
+    requests: list[tuple[str, list[dict]]],
+) -> tuple[list[Optional[dict]], list[Optional[str]], dict[str, list[int]]]:
+    """
+    Resolve what the cache and fast path can; group the rest for the LLM.
+
+    Returns (plans, cache keys, {dedup key: request indices still needing the LLM}).
+    """
+    plans: list[Optional[dict]] = [None] * len(requests)
+    keys: list[Optional[str]] = [None] * len(requests)
+    pending: dict[str, list[int]] = {}
+    for i, (query, uploaded_files) in enumerate(requests):
+        plan, source, keys[i] = _local_plan(query, uploaded_files)
+        if plan is not None:
+            plans[i] = _finalize_plan(plan, source, uploaded_files, keys[i])
+        else:
+            # Identical requests share one slot in the LLM batch
+            dedup = keys[i] or PlanCache.make_key(query, uploaded_files)
+            pending.setdefault(dedup, []).append(i)
+    return plans, keys, pending
+
+
+def _plan_many_apply(
+    requests: list[tuple[str, list[dict]]],
+    plans: list[Optional[dict]],
+    keys: list[Optional[str]],
+    groups: list[list[int]],
+    results: list[tuple[dict, str]],
+) -> list[dict]:
+    for indices, (plan, source) in zip(groups, results):
+        first = indices[0]
+        plans[first] = _finalize_plan(plan, source, requests[first][1], keys[first])
+        for i in indices[1:]:
+            plans[i] = _finalize_plan(copy.deepcopy(plan), source, requests[i][1], None)
+    return plans
+
+
+def plan_many(requests: list[tuple[str, list[dict]]]) -> list[dict]:
+    """
+    Plan many research requests, batching the LLM work.
+
+    Each request goes through the plan cache and fast-path router as in
+    `planner_node`; the remaining (deduplicated) requests are packed
+    config.PLANNER_BATCH_SIZE at a time into single LLM planner calls, up to
+    config.PLANNER_BATCH_CONCURRENCY of them in flight at once.  A plan the
+    LLM omits or garbles — or a whole batch whose call fails — falls back to
+    the default plan for those requests only, and is not cached.  LLM plans
+    are stored in the plan cache, so a later `planner_node` run for the same
+    request reuses them.
+
+    Args:
+        requests: (query, uploaded_files) pairs.
+
+    Returns:
+        One plan per request, in order, in the planner's usual schema.
+    """
+    plans, keys, pending = _plan_many_local(requests)
+    groups = list(pending.values())
+    batches = [[requests[indices[0]] for indices in batch] for batch in _batches(groups)]
+    results: list[tuple[dict, str]] = []
+    if batches:
+        workers = max(1, min(config.PLANNER_BATCH_CONCURRENCY, len(batches)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="plan-batch") as pool:
+            for batch_results in pool.map(metrics.bind_context(_llm_plan_batch), batches):
+                results.extend(batch_results)
+    return _plan_many_apply(requests, plans, keys, groups, results)
+
+
+async def aplan_many(requests: list[tuple[str, list[dict]]]) -> list[dict]:
+    """Async `plan_many`."""
+    plans, keys, pending = _plan_many_local(requests)
+    groups = list(pending.values())
+    limit = asyncio.Semaphore(max(1, config.PLANNER_BATCH_CONCURRENCY))
+
+    async def run(batch: list[list[int]]) -> list[tuple[dict, str]]:
+        async with limit:
+            return await _allm_plan_batch([requests[indices[0]] for indices in batch])
+
+    batch_results = await asyncio.gather(*(run(batch) for batch in _batches(groups)))
+    results = [result for batch in batch_results for result in batch]
+    return _plan_many_apply(requests, plans, keys, groups, results)
@@ -2,14 +2,24 @@
 PDF Extraction Agent
 
 Reads uploaded PDF files from state, extracts text and tables using
-pdfplumber (via utils.pdf_parser), and writes results back to state.
+pdfplumber (via utils.pdf_parser), then keeps the chunks most relevant to
+the query and plan (via utils.retrieval) and writes them back to state.
 
 Follows the PDF Extraction SKILL.md specification.
 """
 
+import asyncio
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 
+import config
+from utils import metrics
+from utils.document_store import get_document_store
 from utils.pdf_parser import PDFParser
+from utils.retrieval import chunk_document, get_document_index
+from utils.upload_registry import resolve_pdf_source
 
 logger = logging.getLogger(__name__)
 
@@ -19,7 +29,8 @@ def pdf_agent_node(state: dict) -> dict:
     LangGraph node: extract content from uploaded PDFs.
 
     Reads: uploaded_files, plan
-    Writes: pdf_content, status
+    Writes: pdf_content, status; per-file extraction seconds go to
+    metrics["pdf_agent"]["file_seconds"]
     """
     uploaded_files = state.get("uploaded_files", [])
     plan = state.get("plan", {})
@@ -27,45 +38,149 @@ def pdf_agent_node(state: dict) -> dict:
     if not uploaded_files:
         return {
             "pdf_content": "",
-            "status": {**state.get("status", {}), "pdf_agent": "⚠️ No PDFs to process"},
+            "status": {"pdf_agent": "⚠️ No PDFs to process"},
         }
 
     parser = PDFParser()
     all_text_parts: list[str] = []
     all_tables: list[str] = []
+    file_seconds: list[dict] = []
 
-    for file_info in uploaded_files:
-        name = file_info.get("name", "unknown.pdf")
-        pdf_bytes = file_info.get("bytes", b"")
+    # With retrieval, parse whole documents and pick passages afterwards;
+    # without it, only parse as many pages as the writer can use.
+    char_budget = (
+        max(1, config.PDF_CHAR_BUDGET // len(uploaded_files))
+        if config.PDF_CHAR_BUDGET and not config.PDF_RETRIEVAL_ENABLED
+        else None
+    )
 
+    def _extract_one(file_info: dict) -> tuple[str, Optional[dict], Optional[Exception], float]:
+        name = file_info.get("name", "unknown.pdf")
+        started = time.perf_counter()
         try:
-            result = parser.extract(pdf_bytes=pdf_bytes)
-            all_text_parts.append(f"## 📄 {name}\n\n{result['text']}")
-
-            if result.get("tables"):
-                all_tables.extend(
-                    [f"### Tables from {name}\n{t}" for t in result["tables"]]
-                )
-
-            meta = result.get("metadata", {})
-            logger.info(
-                "Extracted %d pages from %s",
-                meta.get("pages_processed", 0),
-                name,
-            )
+            # Use the upload-time background extraction when it covers what we need
+            result = None
+            if char_budget is None and file_info.get("doc_id"):
+                result = get_document_store().get(file_info["doc_id"])
+            if result is None:
+                # Registry handles are opened by path, never copied into memory
+                source = resolve_pdf_source(file_info)
+                result = parser.extract(**source, char_budget=char_budget)
+            return name, result, None, time.perf_counter() - started
         except Exception as e:
-            logger.error("Failed to extract from %s: %s", name, e)
-            all_text_parts.append(f"## 📄 {name}\n\n⚠️ Error extracting: {e}")
+            return name, None, e, time.perf_counter() - started
+
+    # Files are parsed concurrently; map() keeps results in upload order
+    workers = max(1, min(config.PDF_MAX_CONCURRENT_FILES, len(uploaded_files)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(metrics.bind_context(_extract_one), uploaded_files))
+
+    selected: dict[int, list[dict]] = {}
+    if config.PDF_RETRIEVAL_ENABLED:
+        extracted = {
+            pos: result
+            for pos, (_, result, error, _) in enumerate(outcomes)
+            if error is None
+        }
+        retrieval_query = " ".join(
+            part for part in (state.get("query", ""), plan.get("pdf_instructions", "")) if part
+        )
+        selected = _retrieve_chunks(extracted, retrieval_query)
+
+    for pos, (name, result, error, elapsed) in enumerate(outcomes):
+        file_seconds.append({
+            "name": name,
+            "doc_id": uploaded_files[pos].get("doc_id"),
+            "seconds": round(elapsed, 3),
+        })
+
+        if error is not None:
+            logger.error("Failed to extract from %s: %s", name, error)
+            all_text_parts.append(f"## 📄 {name}\n\n⚠️ Error extracting: {error}")
+            continue
+
+        if pos in selected:
+            chunks = selected[pos]
+            text = "\n\n".join(c["text"] for c in chunks if c["kind"] == "text")
+            tables = [c["text"] for c in chunks if c["kind"] == "table"]
+        else:
+            text = result["text"]
+            tables = result.get("tables", [])
+
+        all_text_parts.append(f"## 📄 {name}\n\n{text}")
+
+        if tables:
+            all_tables.extend([f"### Tables from {name}\n{t}" for t in tables])
+
+        meta = result.get("metadata", {})
+        logger.info(
+            "Extracted %d pages from %s in %.2fs",
+            meta.get("pages_processed", 0),
+            name,
+            elapsed,
+        )
 
     # Combine everything
     combined = "\n\n".join(all_text_parts)
     if all_tables:
         combined += "\n\n---\n# Extracted Tables\n\n" + "\n\n".join(all_tables)
 
+    metrics.detail("file_seconds", file_seconds)
     return {
         "pdf_content": combined,
-        "status": {
-            **state.get("status", {}),
-            "pdf_agent": f"✅ Extracted {len(uploaded_files)} PDF(s)",
-        },
+        "status": {"pdf_agent": f"✅ Extracted {len(uploaded_files)} PDF(s)"},
+    }
+
+
+async def apdf_agent_node(state: dict) -> dict:
+    """
+    Async `pdf_agent_node`.  Parsing and retrieval are CPU-bound, so the whole
+    node runs on a worker thread and the event loop stays free.
+    """
+    return await asyncio.to_thread(metrics.bind_context(pdf_agent_node), state)
+
+
+def _retrieve_chunks(docs: dict[int, dict], query: str) -> dict[int, list[dict]]:
+    """
+    Pick the chunks of each document most relevant to `query`.
+
+    Each document gets its own BM25 index (cached by content hash, so
+    follow-up queries reuse it).  The top config.PDF_RETRIEVAL_TOP_K hits per
+    document are pooled, ranked by score relative to that document's best hit,
+    and packed greedily into config.PDF_CHAR_BUDGET.  Selected chunks are
+    returned per document key in reading order.
+    """
+    top_k = config.PDF_RETRIEVAL_TOP_K
+    candidates: list[tuple[float, int, int, dict]] = []
+
+    for pos, result in docs.items():
+        meta = result.get("metadata", {})
+        doc_key = f"{meta.get('sha256', pos)}:{config.PDF_CHUNK_CHARS}:{config.PDF_CHUNK_OVERLAP}"
+        index = get_document_index(
+            doc_key, lambda r=result: chunk_document(r["text"], r.get("tables", []))
+        )
+
+        hits = index.top_k(query, top_k)
+        if not hits:
+            # Nothing matched lexically — fall back to the document's lead
+            hits = [(i, 0.0) for i in range(min(top_k, len(index.chunks)))]
+        best = hits[0][1] or 1.0
+        for chunk_idx, score in hits:
+            candidates.append((score / best, pos, chunk_idx, index.chunks[chunk_idx]))
+
+    candidates.sort(key=lambda c: -c[0])
+
+    budget = config.PDF_CHAR_BUDGET or float("inf")
+    used = 0
+    picked: dict[int, list[tuple[int, dict]]] = {pos: [] for pos in docs}
+    for _, pos, chunk_idx, chunk in candidates:
+        size = len(chunk["text"])
+        if used and used + size > budget:
+            continue
+        picked[pos].append((chunk_idx, chunk))
+        used += size
+
+    return {
+        pos: [chunk for _, chunk in sorted(items, key=lambda item: item[0])]
+        for pos, items in picked.items()
     }
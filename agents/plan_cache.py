@@ -0,0 +1,88 @@
+"""
+Plan Cache
+
+Remembers planner output keyed on the normalised query text and the set of
+uploaded document hashes, so re-running the same (or trivially re-cased)
+query against the same uploads skips the planner LLM call.  Entries expire
+after a TTL and the cache is bounded with LRU eviction.
+"""
+
+import copy
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import config
+
+_TRAILING_PUNCT_RE = re.compile(r"[\s?.!]+$")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    return _TRAILING_PUNCT_RE.sub("", " ".join(query.lower().split()))
+
+
+def document_hashes(uploaded_files: list[dict]) -> list[str]:
+    """Content hashes of uploaded_files entries (registry handles or raw bytes)."""
+    hashes = []
+    for f in uploaded_files:
+        if f.get("doc_id"):
+            hashes.append(f["doc_id"])
+        else:
+            hashes.append(hashlib.sha256(f.get("bytes", b"")).hexdigest())
+    return hashes
+
+
+class PlanCache:
+    """In-memory TTL + LRU cache of planner output."""
+
+    def __init__(self, ttl: Optional[int] = None, max_entries: Optional[int] = None):
+        self.ttl = config.PLAN_CACHE_TTL if ttl is None else ttl
+        self.max_entries = max_entries or config.PLAN_CACHE_MAX_ENTRIES
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(query: str, uploaded_files: list[dict]) -> str:
+        docs = ",".join(sorted(document_hashes(uploaded_files)))
+        return f"{normalize_query(query)}|{docs}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a copy of the cached plan, or None if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, plan = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(plan)
+
+    def put(self, key: str, plan: dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), copy.deepcopy(plan))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_default_cache: Optional[PlanCache] = None
+_default_lock = threading.Lock()
+
+
+def get_plan_cache() -> PlanCache:
+    """Return the process-wide PlanCache instance."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PlanCache()
+        return _default_cache
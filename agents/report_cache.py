@@ -0,0 +1,304 @@
+"""
+Report Cache
+
+Stores finished research runs under config.REPORT_CACHE_DIR, keyed on
+(normalised query, uploaded document hashes, model, prompt version), and
+records the search-cache generation the report was built against.
+
+`stream_research` wraps the research graph with incremental invalidation:
+
+  - same key, search results still current → stored report, no LLM calls
+  - same key, search generation moved on   → reuse plan + PDF extraction,
+                                             re-run search; re-run the writer
+                                             only if the results changed
+  - anything else                          → full graph run, then store
+
+It yields the same ("updates" | "custom", chunk) events as
+`research_graph.stream(state, stream_mode=["updates", "custom"])`;
+`astream_research` is its async counterpart over `.astream()`.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import AsyncIterator, Iterator, Optional
+
+from langgraph.graph import StateGraph, END
+
+import config
+from agents.graph import get_research_graph, make_node
+from agents.orchestrator import PLANNER_SYSTEM_PROMPT
+from agents.plan_cache import document_hashes, normalize_query
+from agents.search_agent import asearch_agent_node, search_agent_node
+from agents.state import AgentState
+from agents.writer_agent import WRITER_SYSTEM_PROMPT, awriter_node, writer_node
+from utils.tavily_client import get_search_cache
+
+logger = logging.getLogger(__name__)
+
+# Changes whenever either system prompt is edited, invalidating old reports
+PROMPT_VERSION = hashlib.sha256(
+    (PLANNER_SYSTEM_PROMPT + WRITER_SYSTEM_PROMPT).encode()
+).hexdigest()[:12]
+
+_STREAM_MODES = ["updates", "custom"]
+
+
+def search_generation() -> str:
+    """Current generation of web search data (see SearchCache.generation)."""
+    if config.TAVILY_CACHE_ENABLED:
+        return get_search_cache().generation()
+    return str(int(time.time() // max(config.TAVILY_CACHE_TTL, 1)))
+
+
+class ReportCache:
+    """JSON-file store of finished research runs."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None):
+        self.cache_dir = cache_dir or config.REPORT_CACHE_DIR
+        self.max_entries = max_entries or config.REPORT_CACHE_MAX_ENTRIES
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(query: str, uploaded_files: list[dict], model: Optional[str] = None) -> str:
+        parts = [
+            normalize_query(query),
+            ",".join(sorted(document_hashes(uploaded_files))),
+            model or config.LLM_MODEL,
+            PROMPT_VERSION,
+        ]
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                entry = json.load(fh)
+            os.utime(path)  # Bump recency for eviction
+            return entry
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Discarding unreadable report cache entry %s: %s", key, e)
+            return None
+
+    def put(self, key: str, state: dict) -> None:
+        """Store the parts of a finished run needed to serve or refresh it."""
+        entry = {
+            "query": state.get("query", ""),
+            "model": config.LLM_MODEL,
+            "prompt_version": PROMPT_VERSION,
+            "search_generation": search_generation(),
+            "created_at": time.time(),
+            "plan": state.get("plan", {}),
+            "pdf_content": state.get("pdf_content", ""),
+            "search_results": state.get("search_results", []),
+            "report": state.get("report", ""),
+        }
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(entry, fh)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning("Could not store report %s: %s", key, e)
+            return
+        self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _evict(self) -> None:
+        with self._lock:
+            paths = [
+                os.path.join(self.cache_dir, name)
+                for name in os.listdir(self.cache_dir)
+                if name.endswith(".json")
+            ]
+            if len(paths) <= self.max_entries:
+                return
+            paths.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+            for path in paths[: len(paths) - self.max_entries]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def build_refresh_graph():
+    """Search → writer only; used when a stored report's web data is stale."""
+    graph = StateGraph(AgentState)
+    graph.add_node(
+        "search_agent", make_node("search_agent", search_agent_node, asearch_agent_node)
+    )
+    graph.add_node("writer", make_node("writer", writer_node, awriter_node))
+    graph.set_entry_point("search_agent")
+    graph.add_edge("search_agent", "writer")
+    graph.add_edge("writer", END)
+    return graph.compile()
+
+
+_refresh_graph = None
+_default_cache: Optional[ReportCache] = None
+_default_lock = threading.Lock()
+
+
+def get_report_cache() -> ReportCache:
+    """Return the process-wide ReportCache instance."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = ReportCache()
+        return _default_cache
+
+
+def _get_refresh_graph():
+    global _refresh_graph
+    with _default_lock:
+        if _refresh_graph is None:
+            _refresh_graph = build_refresh_graph()
+        return _refresh_graph
+
+
+def _plan_run(
+    initial_state: dict,
+) -> tuple[list[tuple[str, dict]], Optional[dict], object, str, Optional[dict]]:
+    """
+    Decide how to serve a request (see the module docstring).
+
+    Returns (events to emit first, state to run — or None when the stored
+    report is served as is —, graph to run it on, report cache key, stored
+    entry being refreshed or None).
+    """
+    key = ReportCache.make_key(
+        initial_state.get("query", ""), initial_state.get("uploaded_files", [])
+    )
+    entry = get_report_cache().get(key)
+
+    if entry is None:
+        return [], dict(initial_state), get_research_graph(), key, None
+
+    uses_search = entry.get("plan", {}).get("use_search_agent", False)
+    if not uses_search or entry.get("search_generation") == search_generation():
+        logger.info("Report cache hit for '%s'", initial_state.get("query", ""))
+        hit = {
+            "report_cache": {
+                "plan": entry["plan"],
+                "pdf_content": entry["pdf_content"],
+                "search_results": entry["search_results"],
+                "report": entry["report"],
+                "status": {"report_cache": "✅ Served stored report"},
+            }
+        }
+        return [("updates", hit)], None, None, key, None
+
+    # Plan and PDF extraction are still valid; only web data is stale
+    logger.info("Refreshing search + writer for '%s'", initial_state.get("query", ""))
+    reused = {
+        "report_cache": {
+            "status": {"report_cache": "♻️ Reused plan and PDF extraction"},
+        }
+    }
+    state = {
+        **initial_state,
+        "plan": entry["plan"],
+        "pdf_content": entry["pdf_content"],
+    }
+    return [("updates", reused)], state, _get_refresh_graph(), key, entry
+
+
+def _merge_update(final_state: dict, mode: str, chunk: dict) -> None:
+    if mode == "updates":
+        for update in chunk.values():
+            if update:
+                final_state.update(update)
+
+
+def _unchanged_search(entry: Optional[dict], mode: str, chunk: dict) -> Optional[tuple[str, dict]]:
+    """
+    During a refresh, the event serving the stored report if the refreshed
+    search results equal the stored ones (the writer would see identical
+    inputs); otherwise None.
+    """
+    if entry is None or mode != "updates":
+        return None
+    update = chunk.get("search_agent")
+    if not update or update.get("search_results") != entry["search_results"]:
+        return None
+    logger.info("Search results unchanged; serving stored report")
+    return "updates", {
+        "report_cache": {
+            "report": entry["report"],
+            "status": {"report_cache": "✅ Search results unchanged; served stored report"},
+        }
+    }
+
+
+def stream_research(initial_state: dict) -> Iterator[tuple[str, dict]]:
+    """
+    Run (or serve) a research request, yielding (mode, chunk) stream events.
+
+    See the module docstring for the reuse rules.  Disabled entirely when
+    config.REPORT_CACHE_ENABLED is false.
+    """
+    if not config.REPORT_CACHE_ENABLED:
+        yield from get_research_graph().stream(initial_state, stream_mode=_STREAM_MODES)
+        return
+
+    events, state, graph, key, entry = _plan_run(initial_state)
+    yield from events
+    if state is None:
+        return
+
+    final_state = dict(state)
+    stream = graph.stream(state, stream_mode=_STREAM_MODES)
+    try:
+        for mode, chunk in stream:
+            _merge_update(final_state, mode, chunk)
+            yield mode, chunk
+            served = _unchanged_search(entry, mode, chunk)
+            if served is not None:
+                _merge_update(final_state, *served)
+                yield served
+                break  # The writer step never starts
+    finally:
+        stream.close()
+
+    if final_state.get("report"):
+        get_report_cache().put(key, final_state)
+
+
+async def astream_research(initial_state: dict) -> AsyncIterator[tuple[str, dict]]:
+    """Async `stream_research`, driving the graph with `.astream()`."""
+    if not config.REPORT_CACHE_ENABLED:
+        async for event in get_research_graph().astream(initial_state, stream_mode=_STREAM_MODES):
+            yield event
+        return
+
+    events, state, graph, key, entry = _plan_run(initial_state)
+    for event in events:
+        yield event
+    if state is None:
+        return
+
+    final_state = dict(state)
+    stream = graph.astream(state, stream_mode=_STREAM_MODES)
+    try:
+        async for mode, chunk in stream:
+            _merge_update(final_state, mode, chunk)
+            yield mode, chunk
+            served = _unchanged_search(entry, mode, chunk)
+            if served is not None:
+                _merge_update(final_state, *served)
+                yield served
+                break  # The writer step never starts
+    finally:
+        await stream.aclose()
+
+    if final_state.get("report"):
+        get_report_cache().put(key, final_state)
@@ -3,24 +3,65 @@ Web Search Agent
 
 Uses the Tavily API to search for current market data and information.
 Follows the Web Search SKILL.md specification.
+
+A speculative node at graph entry starts a search for the raw user query in
+parallel with the planner; the search agent later joins that in-flight
+request instead of paying for another round-trip.
 """
 
 import logging
 
+import config
+from agents.orchestrator import fast_plan
+from agents.plan_cache import normalize_query
 from utils.tavily_client import TavilySearch
 
 logger = logging.getLogger(__name__)
 
 
-def search_agent_node(state: dict) -> dict:
+def _should_speculate(state: dict) -> bool:
+    query = state.get("query", "")
+    if not config.SPECULATIVE_SEARCH_ENABLED or not query:
+        return False
+    plan, confidence = fast_plan(query, state.get("uploaded_files", []))
+    return confidence < config.FAST_PLANNER_MIN_CONFIDENCE or plan["use_search_agent"]
+
+
+def _speculative_update(query: str) -> dict:
+    logger.info("Speculative search started for '%s'", query)
+    return {
+        "speculative_queries": [query],
+        "status": {"search_agent": "🔮 Speculative search started"},
+    }
+
+
+def speculative_search_node(state: dict) -> dict:
     """
-    LangGraph node: perform web searches based on the plan.
+    LangGraph node: kick off a background search for the raw query.
 
-    Reads: plan
-    Writes: search_results, status
+    Returns immediately; the request runs while the planner thinks.  Skipped
+    when the fast-path router is confident no web search is needed.
+
+    Reads: query, uploaded_files
+    Writes: speculative_queries, status
     """
-    plan = state.get("plan", {})
-    search_queries = plan.get("search_queries", [])
+    if not _should_speculate(state):
+        return {}
+    TavilySearch().prefetch(state["query"])
+    return _speculative_update(state["query"])
+
+
+async def aspeculative_search_node(state: dict) -> dict:
+    """Async `speculative_search_node`: the search runs as a task on the loop."""
+    if not _should_speculate(state):
+        return {}
+    await TavilySearch().aprefetch(state["query"])
+    return _speculative_update(state["query"])
+
+
+def _search_queries(state: dict) -> list[str]:
+    """Planner queries (or the raw query) plus any speculative ones not already planned."""
+    search_queries = state.get("plan", {}).get("search_queries", [])
 
     if not search_queries:
         # Fallback to the original query
@@ -28,26 +69,24 @@ def search_agent_node(state: dict) -> dict:
         search_queries = [query] if query else []
 
     if not search_queries:
-        return {
-            "search_results": [],
-            "status": {
-                **state.get("status", {}),
-                "search_agent": "⚠️ No search queries",
-            },
-        }
-
-    searcher = TavilySearch()
-    all_results: list[dict] = []
+        return []
 
-    for query in search_queries:
-        try:
-            results = searcher.search(query)
-            for r in results:
-                r["query"] = query  # Tag which query produced this result
-            all_results.extend(results)
-            logger.info("Search '%s' returned %d results", query, len(results))
-        except Exception as e:
-            logger.error("Search failed for '%s': %s", query, e)
+    # Merge in speculative searches the planner didn't ask for — they are
+    # already paid for and resolve from the in-flight request or the cache
+    planned = {normalize_query(q) for q in search_queries}
+    return search_queries + [
+        q for q in state.get("speculative_queries", []) if normalize_query(q) not in planned
+    ]
+
+
+def _search_update(search_queries: list[str], batches: list[list[dict]]) -> dict:
+    """Tag results with their query, dedup by URL and build the state update."""
+    all_results: list[dict] = []
+    for query, results in zip(search_queries, batches):
+        for r in results:
+            r["query"] = query  # Tag which query produced this result
+        all_results.extend(results)
+        logger.info("Search '%s' returned %d results", query, len(results))
 
     # Deduplicate by URL
     seen_urls: set[str] = set()
@@ -60,7 +99,40 @@ def search_agent_node(state: dict) -> dict:
     return {
         "search_results": unique_results,
         "status": {
-            **state.get("status", {}),
             "search_agent": f"✅ Found {len(unique_results)} results",
         },
     }
+
+
+_NO_QUERIES = {
+    "search_results": [],
+    "status": {
+        "search_agent": "⚠️ No search queries",
+    },
+}
+
+
+def search_agent_node(state: dict) -> dict:
+    """
+    LangGraph node: perform web searches based on the plan.
+
+    Reads: plan, query, speculative_queries
+    Writes: search_results, status
+    """
+    search_queries = _search_queries(state)
+    if not search_queries:
+        return dict(_NO_QUERIES)
+
+    # All planner queries go out at once; results come back in query order
+    batches = TavilySearch().search_many(search_queries)
+    return _search_update(search_queries, batches)
+
+
+async def asearch_agent_node(state: dict) -> dict:
+    """Async `search_agent_node`: searches are awaited concurrently on the loop."""
+    search_queries = _search_queries(state)
+    if not search_queries:
+        return dict(_NO_QUERIES)
+
+    batches = await TavilySearch().asearch_many(search_queries)
+    return _search_update(search_queries, batches)
@@ -6,10 +6,15 @@ Defines the TypedDict that flows through all agent nodes.
 
 from typing import Annotated, TypedDict
 
-from langchain_core.messages import BaseMessage
+from langchain_core.messages import BaseMessage, HumanMessage
 from langgraph.graph.message import add_messages
 
 
+def merge_dicts(left: dict | None, right: dict | None) -> dict:
+    """Reducer: shallow-merge dict updates so parallel branches don't clobber each other."""
+    return {**(left or {}), **(right or {})}
+
+
 class AgentState(TypedDict):
     """State shared across all nodes in the LangGraph research pipeline."""
 
@@ -19,20 +24,45 @@ class AgentState(TypedDict):
     # Structured plan produced by the orchestrator
     plan: dict
 
-    # Files uploaded by the user (list of {name, bytes} dicts)
+    # Files uploaded by the user: registry handles ({name, doc_id, path, size},
+    # see utils.upload_registry) or, for headless callers, {name, bytes} dicts
     uploaded_files: list[dict]
 
     # Text extracted from PDFs
     pdf_content: str
 
+    # Queries searched speculatively at graph entry, before the plan existed
+    speculative_queries: list[str]
+
     # Web search results (list of result dicts)
     search_results: list[dict]
 
     # Final synthesised report
     report: str
 
-    # Status updates for the UI  (agent_name → status string)
-    status: dict
+    # Status updates for the UI  (agent_name → status string).
+    # Merged per key because pdf_agent and search_agent run in parallel.
+    status: Annotated[dict, merge_dicts]
+
+    # Per-node run metrics (node_name → timings and counters, see
+    # utils.metrics).  Merged per key for the same reason as `status`.
+    metrics: Annotated[dict, merge_dicts]
 
     # Chat history
     messages: Annotated[list[BaseMessage], add_messages]
+
+
+def initial_state(query: str, uploaded_files: list[dict] | None = None) -> dict:
+    """Starting AgentState for a new research request."""
+    return {
+        "query": query,
+        "plan": {},
+        "uploaded_files": uploaded_files or [],
+        "pdf_content": "",
+        "speculative_queries": [],
+        "search_results": [],
+        "report": "",
+        "status": {},
+        "metrics": {},
+        "messages": [HumanMessage(content=query)],
+    }
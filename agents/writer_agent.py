@@ -2,17 +2,25 @@
 Financial Writer Agent
 
 Synthesises research findings (PDF extracts + web search results) into
-a professional, financial-language report.
+a professional, financial-language report.  Tokens are streamed as they are
+generated through LangGraph's "custom" stream mode as
+{"node": "writer", "token": str} events.  The research context is packed to
+a token budget by agents.context_packer.
 
 Follows the Financial Writer SKILL.md specification.
 """
 
 import logging
+from typing import Optional
 
 from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
+from langchain_core.messages.ai import add_usage
+from langgraph.config import get_stream_writer
 
 import config
+from agents.context_packer import context_budget, pack_writer_context
+from agents.llm import get_async_llm, get_llm
+from utils import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +50,21 @@ If data comes from web search, include the URL.
 """
 
 
+def _writer_messages(state: dict) -> list:
+    """System + user messages carrying the query, plan and gathered research."""
+    user_content = pack_writer_context(
+        state.get("query", ""),
+        state.get("plan", {}),
+        state.get("pdf_content", ""),
+        state.get("search_results", []),
+        budget=context_budget(WRITER_SYSTEM_PROMPT),
+    )
+    return [
+        SystemMessage(content=WRITER_SYSTEM_PROMPT),
+        HumanMessage(content=user_content),
+    ]
+
+
 def writer_node(state: dict) -> dict:
     """
     LangGraph node: produce the final financial research report.
@@ -49,70 +72,51 @@ def writer_node(state: dict) -> dict:
     Reads: query, plan, pdf_content, search_results
     Writes: report, status, messages
     """
-    query = state.get("query", "")
-    plan = state.get("plan", {})
-    pdf_content = state.get("pdf_content", "")
-    search_results = state.get("search_results", [])
-
-    llm = ChatOpenAI(
-        model=config.LLM_MODEL,
-        temperature=config.LLM_TEMPERATURE,
-        api_key=config.OPENAI_API_KEY,
-        max_tokens=config.WRITER_MAX_TOKENS,
-    )
-
-    # Build the context for the writer
-    context_parts: list[str] = []
-
-    context_parts.append(f"## Research Query\n{query}")
-
-    if plan.get("writer_instructions"):
-        context_parts.append(
-            f"## Special Instructions\n{plan['writer_instructions']}"
-        )
-
-    if pdf_content:
-        # Truncate if too long (keep first 12k chars to leave room for search)
-        truncated = pdf_content[:12000]
-        if len(pdf_content) > 12000:
-            truncated += "\n\n[... PDF content truncated for length ...]"
-        context_parts.append(f"## Extracted PDF Content\n{truncated}")
-
-    if search_results:
-        search_text_parts: list[str] = []
-        for i, r in enumerate(search_results[:10], 1):
-            search_text_parts.append(
-                f"{i}. **{r.get('title', 'Untitled')}**\n"
-                f"   URL: {r.get('url', 'N/A')}\n"
-                f"   {r.get('content', '')}\n"
-            )
-        context_parts.append(
-            "## Web Search Results\n" + "\n".join(search_text_parts)
-        )
-
-    if not pdf_content and not search_results:
-        context_parts.append(
-            "## Note\nNo PDF content or web search results were available. "
-            "Please provide your best analysis based on your training knowledge, "
-            "and clearly indicate when information is from your general knowledge."
-        )
-
-    user_content = "\n\n---\n\n".join(context_parts)
-
-    messages = [
-        SystemMessage(content=WRITER_SYSTEM_PROMPT),
-        HumanMessage(content=user_content),
-    ]
-
-    response = llm.invoke(messages)
-    report = response.content
-
+    llm = get_llm(max_tokens=config.WRITER_MAX_TOKENS)
+    emit = _stream_writer()
+    report_parts: list[str] = []
+    usage = None
+    for chunk in llm.stream(_writer_messages(state)):
+        token = chunk.content
+        if token:
+            report_parts.append(token)
+            emit({"node": "writer", "token": token})
+        if chunk.usage_metadata:
+            usage = add_usage(usage, chunk.usage_metadata)
+    return _writer_update("".join(report_parts), usage)
+
+
+async def awriter_node(state: dict) -> dict:
+    """Async `writer_node`: tokens are streamed with `astream`."""
+    llm = get_async_llm(max_tokens=config.WRITER_MAX_TOKENS)
+    emit = _stream_writer()
+    report_parts: list[str] = []
+    usage = None
+    async for chunk in llm.astream(_writer_messages(state)):
+        token = chunk.content
+        if token:
+            report_parts.append(token)
+            emit({"node": "writer", "token": token})
+        if chunk.usage_metadata:
+            usage = add_usage(usage, chunk.usage_metadata)
+    return _writer_update("".join(report_parts), usage)
+
+
+def _writer_update(report: str, usage: Optional[dict]) -> dict:
+    metrics.record_llm_usage(usage)
     logger.info("Report generated (%d chars)", len(report))
 
     return {
         "report": report,
         "status": {
-            **state.get("status", {}),
             "writer": "✅ Report generated",
         },
     }
+
+
+def _stream_writer():
+    """Return LangGraph's custom stream writer, or a no-op outside a graph run."""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda _event: None
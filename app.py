@@ -6,11 +6,16 @@ Upload PDFs, ask research questions, and get professional financial reports.
 """
 
 import logging
+import uuid
+
 import streamlit as st
-from langchain_core.messages import HumanMessage, AIMessage
 
 import config
-from agents.graph import research_graph
+from agents.jobs import FINISHED_STATES, JobRejected, get_job_service
+from agents.state import initial_state
+from utils.document_store import get_document_store
+from utils.metrics import summarize
+from utils.upload_registry import get_upload_registry
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -205,6 +210,9 @@ def init_session_state():
         "agent_status": {},
         "research_count": 0,
         "current_report": "",
+        "last_metrics": {},
+        "user_id": uuid.uuid4().hex,  # Per browser session; keys the per-user job limit
+        "active_job": None,
     }
     for key, val in defaults.items():
         if key not in st.session_state:
@@ -230,14 +238,28 @@ def render_sidebar():
         )
 
         if uploaded_files:
-            st.session_state["uploaded_files_data"] = [
-                {"name": f.name, "bytes": f.read()} for f in uploaded_files
-            ]
+            # Handles only — each document's bytes are stored once in the
+            # registry, and already-registered files are not re-read on rerun.
+            registry = get_upload_registry()
+            handles = [registry.register_upload(f) for f in uploaded_files]
+            st.session_state["uploaded_files_data"] = handles
+
+            # Start parsing now, while the user is still typing their question
+            names = [f.name for f in uploaded_files]
+            if config.PDF_PREEXTRACT_ENABLED:
+                store = get_document_store()
+                for handle in handles:
+                    store.prefetch(handle)
+                # Refreshed on each rerun: ✅ parsed, ⏳ still extracting
+                names = [
+                    f'{name} {"✅" if store.is_ready(handle["doc_id"]) else "⏳"}'
+                    for name, handle in zip(names, handles)
+                ]
             st.markdown(f"""
             <div class="glass-card">
                 <strong style="color:#a5b4fc;">📎 {len(uploaded_files)} file(s) loaded</strong><br>
                 <span style="color:rgba(255,255,255,0.5);font-size:0.85rem;">
-                    {', '.join(f.name for f in uploaded_files)}
+                    {', '.join(names)}
                 </span>
             </div>
             """, unsafe_allow_html=True)
@@ -293,13 +315,76 @@ def render_sidebar():
         </div>
         """, unsafe_allow_html=True)
 
+        # Metrics of the most recent run
+        last_metrics = st.session_state.get("last_metrics", {})
+        if last_metrics:
+            totals = summarize(last_metrics)
+            tokens = totals["llm_prompt_tokens"] + totals["llm_completion_tokens"]
+            st.markdown(f"""
+            <div class="metric-row">
+                <div class="metric-card">
+                    <div class="metric-value">{tokens:,}</div>
+                    <div class="metric-label">LLM Tokens</div>
+                </div>
+                <div class="metric-card">
+                    <div class="metric-value">{totals["tavily_calls"]}</div>
+                    <div class="metric-label">Searches</div>
+                </div>
+                <div class="metric-card">
+                    <div class="metric-value">{totals["pages_parsed"]}</div>
+                    <div class="metric-label">Pages</div>
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+            with st.expander("⏱️ Last run by agent"):
+                if "planner" in last_metrics:
+                    plan_source = (
+                        "plan cache" if totals["plan_cache_hits"]
+                        else "rule-based router" if totals["fast_plans"]
+                        else "default (LLM reply unusable)" if totals["plan_fallbacks"]
+                        else "LLM"
+                    )
+                    st.caption(f"Plan from: {plan_source}")
+                st.dataframe(
+                    [
+                        {
+                            "agent": node,
+                            "wall s": m.get("wall_s", 0),
+                            "cpu s": m.get("cpu_s", 0),
+                            "Δ process RSS MB": m.get("process_rss_delta_mb", 0),
+                            "tokens in/out": (
+                                f'{m.get("llm_prompt_tokens", 0)}/{m.get("llm_completion_tokens", 0)}'
+                            ),
+                            "searches": m.get("tavily_calls", 0),
+                            "pages": m.get("pages_parsed", 0),
+                        }
+                        for node, m in last_metrics.items()
+                    ],
+                    hide_index=True,
+                    use_container_width=True,
+                )
+                file_seconds = last_metrics.get("pdf_agent", {}).get("file_seconds", [])
+                if file_seconds:
+                    st.caption(
+                        "PDF extraction: "
+                        + ", ".join(f'{f["name"]} {f["seconds"]:.1f}s' for f in file_seconds)
+                    )
+                st.caption(
+                    "cpu s is the agent's own CPU time; Δ process RSS MB is "
+                    "process-wide and includes agents and sessions running alongside."
+                )
+
         st.markdown("---")
 
         # Clear chat
         if st.button("🗑️ Clear Chat", use_container_width=True):
+            if st.session_state["active_job"]:
+                get_job_service().cancel(st.session_state["active_job"])
+                st.session_state["active_job"] = None
             st.session_state["messages"] = []
             st.session_state["agent_status"] = {}
             st.session_state["current_report"] = ""
+            st.session_state["last_metrics"] = {}
             st.rerun()
 
         # About
@@ -317,66 +402,88 @@ def render_sidebar():
 
 
 # ── Research Pipeline ─────────────────────────────────────────────────────────
-def run_research(query: str):
-    """Execute the full LangGraph research pipeline."""
+_BADGES = {
+    "report_cache": ("🗄️", "badge-writer"),
+    "speculative_search": ("🔮", "badge-search"),
+    "planner": ("🧠", "badge-planner"),
+    "pdf_agent": ("📄", "badge-pdf"),
+    "search_agent": ("🔍", "badge-search"),
+    "writer": ("✍️", "badge-writer"),
+}
+
+
+def start_research(query: str) -> None:
+    """Submit a research job for this session; progress is polled by render_active_job."""
     uploaded = st.session_state.get("uploaded_files_data", [])
+    try:
+        job_id = get_job_service().submit(
+            initial_state(query, uploaded), user_id=st.session_state["user_id"]
+        )
+    except JobRejected as e:
+        st.session_state["job_error"] = f"⏳ {e}"
+        return
+    st.session_state["active_job"] = job_id
+    st.session_state["agent_status"] = {}
 
-    initial_state = {
-        "query": query,
-        "plan": {},
-        "uploaded_files": uploaded,
-        "pdf_content": "",
-        "search_results": [],
-        "report": "",
-        "status": {},
-        "messages": [HumanMessage(content=query)],
-    }
 
-    status_container = st.empty()
-
-    # Stream through the graph to show progress
-    final_state = None
-    with st.spinner("🔬 Research agents are working..."):
-        try:
-            for step in research_graph.stream(initial_state):
-                # Each step is {node_name: state_update}
-                for node_name, state_update in step.items():
-                    new_status = state_update.get("status", {})
-                    if new_status:
-                        st.session_state["agent_status"].update(new_status)
-
-                    # Show live agent activity
-                    badge_map = {
-                        "planner": ("🧠", "badge-planner"),
-                        "pdf_agent": ("📄", "badge-pdf"),
-                        "search_agent": ("🔍", "badge-search"),
-                        "writer": ("✍️", "badge-writer"),
-                    }
-                    icon, cls = badge_map.get(node_name, ("🔧", "badge-planner"))
-                    status_container.markdown(
-                        f'<div class="glass-card">'
-                        f'<span class="agent-badge {cls}">{icon} {node_name}</span> '
-                        f'<span style="color:rgba(255,255,255,0.6);">processing...</span>'
-                        f'</div>',
-                        unsafe_allow_html=True,
-                    )
+def _finish_job(job: dict) -> None:
+    """Move a finished job's results into session state."""
+    st.session_state["active_job"] = None
+    st.session_state["agent_status"].update(job["status"])
+    st.session_state["last_metrics"] = job["metrics"]
 
-                    if "report" in state_update and state_update["report"]:
-                        final_state = state_update
+    if job["state"] == "succeeded" and job["report"]:
+        st.session_state["research_count"] += 1
+        st.session_state["current_report"] = job["report"]
+        st.session_state["messages"].append({"role": "assistant", "content": job["report"]})
+    elif job["state"] == "failed":
+        logger.error("Pipeline error: %s", job["error"])
+        st.session_state["job_error"] = f"❌ Research pipeline error: {job['error']}"
+    elif job["state"] == "cancelled":
+        st.session_state["job_error"] = "🛑 Research cancelled"
+    else:
+        st.session_state["job_error"] = (
+            "⚠️ Could not generate a report. Check your API keys and try again."
+        )
 
-        except Exception as e:
-            st.error(f"❌ Research pipeline error: {e}")
-            logger.error("Pipeline error: %s", e, exc_info=True)
-            return None
 
-    status_container.empty()
+@st.fragment(run_every=config.JOB_POLL_SECONDS)
+def render_active_job():
+    """Poll the session's running job and show its progress without blocking."""
+    job_id = st.session_state.get("active_job")
+    job = get_job_service().get(job_id) if job_id else None
+    if job is None:
+        st.session_state["active_job"] = None
+        return
 
-    if final_state and final_state.get("report"):
-        st.session_state["research_count"] += 1
-        st.session_state["current_report"] = final_state["report"]
-        return final_state["report"]
+    if job["state"] in FINISHED_STATES:
+        _finish_job(job)
+        st.rerun()  # Full rerun: show the report in the chat history
 
-    return None
+    st.session_state["agent_status"].update(job["status"])
+
+    if job["state"] == "queued":
+        label = f"⏳ queued (position {job['queue_position']})"
+        cls = "badge-planner"
+    else:
+        icon, cls = _BADGES.get(job["current_node"], ("🔬", "badge-planner"))
+        label = f"{icon} {job['current_node'] or 'starting'}"
+
+    col1, col2 = st.columns([5, 1])
+    with col1:
+        st.markdown(
+            f'<div class="glass-card">'
+            f'<span class="agent-badge {cls}">{label}</span> '
+            f'<span style="color:rgba(255,255,255,0.6);">Research agents are working...</span>'
+            f'</div>',
+            unsafe_allow_html=True,
+        )
+    with col2:
+        if st.button("🛑 Cancel", use_container_width=True):
+            get_job_service().cancel(job_id)
+
+    if job["report"]:
+        st.markdown(job["report"] + " ▌")
 
 
 # ── Main Content ──────────────────────────────────────────────────────────────
@@ -401,9 +508,34 @@ def render_main():
             )
             st.markdown(msg["content"])
 
+    messages = st.session_state["messages"]
+    if messages and messages[-1]["role"] == "assistant" and not st.session_state["active_job"]:
+        report = messages[-1]["content"]
+
+        # Download button
+        col1, col2, _ = st.columns([1, 1, 3])
+        with col1:
+            st.download_button(
+                label="📥 Download Report",
+                data=report,
+                file_name="market_research_report.md",
+                mime="text/markdown",
+            )
+        with col2:
+            st.download_button(
+                label="📋 Copy as Text",
+                data=report,
+                file_name="market_research_report.txt",
+                mime="text/plain",
+            )
+
+    if st.session_state.get("job_error"):
+        st.warning(st.session_state.pop("job_error"))
+
     # ── Input ─────────────────────────────────────────────────────────────
     query = st.chat_input(
-        "Ask a market research question... (e.g. 'Analyse the EV market outlook for 2025')"
+        "Ask a market research question... (e.g. 'Analyse the EV market outlook for 2025')",
+        disabled=bool(st.session_state["active_job"]),
     )
 
     if query:
@@ -413,36 +545,12 @@ def render_main():
             f'<div class="user-msg"><strong>🧑 You</strong><br>{query}</div>',
             unsafe_allow_html=True,
         )
+        start_research(query)
+        if st.session_state.get("job_error"):
+            st.warning(st.session_state.pop("job_error"))
 
-        # Run research
-        report = run_research(query)
-
-        if report:
-            st.session_state["messages"].append({"role": "assistant", "content": report})
-            st.markdown(
-                '<div class="ai-msg"><strong>📊 Research Report</strong></div>',
-                unsafe_allow_html=True,
-            )
-            st.markdown(report)
-
-            # Download button
-            col1, col2, _ = st.columns([1, 1, 3])
-            with col1:
-                st.download_button(
-                    label="📥 Download Report",
-                    data=report,
-                    file_name="market_research_report.md",
-                    mime="text/markdown",
-                )
-            with col2:
-                st.download_button(
-                    label="📋 Copy as Text",
-                    data=report,
-                    file_name="market_research_report.txt",
-                    mime="text/plain",
-                )
-        else:
-            st.warning("⚠️ Could not generate a report. Check your API keys and try again.")
+    if st.session_state["active_job"]:
+        render_active_job()
 
 
 # ── Entrypoint ────────────────────────────────────────────────────────────────
@@ -0,0 +1,299 @@
+"""
+Market Research GPT — Batch Runner
+
+Runs a JSONL file of research requests through the pipeline without the UI,
+e.g. a nightly pass over a watchlist and a folder of filings:
+
+    {"id": "nvda", "query": "NVIDIA data-centre outlook", "pdfs": ["filings/nvda-10k.pdf"]}
+    {"query": "AMD margin trends"}
+
+    uv run python batch.py watchlist.jsonl --parallel 8
+
+Each line needs a `query`; `pdfs` (paths, relative to --pdf-dir or the input
+file's folder) and `id` are optional — without an id, one is derived from the
+query and PDFs, so re-runs line up with earlier results.
+
+Requests run on a ResearchJobService with --parallel workers in this one
+process, so the PDF, search, plan and report caches are shared by every
+item.  With the plan cache on, all plans are made up front with
+`plan_many`, which batches the LLM planner calls.  Reports go to
+<output-dir>/reports/<id>.md and every finished item is appended to
+<output-dir>/checkpoint.jsonl; re-running the same command skips items that
+already succeeded.  A summary with throughput, per-stage times and counter
+totals (LLM tokens, searches, pages, plan sources) is printed and written
+to <output-dir>/summary.json.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import config
+from agents.jobs import FAILED, FINISHED_STATES, SUCCEEDED, ResearchJobService
+from agents.orchestrator import plan_many
+from agents.state import initial_state
+from utils.metrics import summarize
+from utils.pdf_cache import hash_file
+
+logger = logging.getLogger("batch")
+
+_ID_RE = re.compile(r"[^A-Za-z0-9._-]+")
+_POLL_SECONDS = 0.2
+
+
+# ── Input ─────────────────────────────────────────────────────────────────────
+
+
+def load_items(path: str, pdf_dir: Optional[str] = None) -> list[dict]:
+    """
+    Parse the input JSONL.
+
+    Returns:
+        One dict per line with keys: id, query, pdfs (absolute paths), and
+        error (set for lines that can't be run).
+    """
+    base = pdf_dir or os.path.dirname(os.path.abspath(path))
+    items: list[dict] = []
+    seen: set[str] = set()
+
+    with open(path, "r", encoding="utf-8") as fh:
+        for lineno, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                raw = json.loads(line)
+                query = raw["query"].strip()
+                if not query:
+                    raise ValueError("empty query")
+            except (ValueError, KeyError, AttributeError, TypeError) as e:
+                items.append({"id": f"line-{lineno}", "query": "", "pdfs": [],
+                              "error": f"Invalid input on line {lineno}: {e}"})
+                continue
+
+            pdfs = [os.path.abspath(os.path.join(base, p)) for p in raw.get("pdfs", [])]
+            item_id = _ID_RE.sub("-", str(raw["id"])).strip("-") if raw.get("id") else (
+                hashlib.sha256("|".join([query, *sorted(pdfs)]).encode()).hexdigest()[:16]
+            )
+            if item_id in seen:
+                item_id = f"{item_id}-{lineno}"
+            seen.add(item_id)
+
+            missing = [p for p in pdfs if not os.path.isfile(p)]
+            items.append({
+                "id": item_id,
+                "query": query,
+                "pdfs": pdfs,
+                "error": f"PDF not found: {', '.join(missing)}" if missing else None,
+            })
+    return items
+
+
+def _pdf_handles(pdfs: list[str], hashes: dict[str, str]) -> list[dict]:
+    """uploaded_files entries that open each filing in place, by path."""
+    handles = []
+    for path in pdfs:
+        if path not in hashes:
+            hashes[path] = hash_file(path)
+        handles.append({
+            "name": os.path.basename(path),
+            "doc_id": hashes[path],
+            "path": path,
+            "size": os.path.getsize(path),
+        })
+    return handles
+
+
+# ── Checkpoint ────────────────────────────────────────────────────────────────
+
+
+def load_checkpoint(path: str) -> dict[str, dict]:
+    """Latest checkpoint record per item id (a torn final line is ignored)."""
+    records: dict[str, dict] = {}
+    if not os.path.exists(path):
+        return records
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            records[record["id"]] = record
+    return records
+
+
+def _append_checkpoint(fh, record: dict) -> None:
+    fh.write(json.dumps(record) + "\n")
+    fh.flush()
+    os.fsync(fh.fileno())
+
+
+def _write_report(reports_dir: str, item_id: str, report: str) -> str:
+    path = os.path.join(reports_dir, f"{item_id}.md")
+    fd, tmp_path = tempfile.mkstemp(dir=reports_dir, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(report)
+    os.replace(tmp_path, path)
+    return path
+
+
+# ── Run ───────────────────────────────────────────────────────────────────────
+
+
+def run_batch(
+    items: list[dict],
+    output_dir: str,
+    parallel: int,
+    retry_failed: bool = True,
+) -> dict:
+    """Run every item not already done; returns the summary dict."""
+    reports_dir = os.path.join(output_dir, "reports")
+    os.makedirs(reports_dir, exist_ok=True)
+    checkpoint_path = os.path.join(output_dir, "checkpoint.jsonl")
+
+    done = load_checkpoint(checkpoint_path)
+    skip = {
+        item_id for item_id, record in done.items()
+        if record["state"] == SUCCEEDED or (record["state"] == FAILED and not retry_failed)
+    }
+    todo = [item for item in items if item["id"] not in skip]
+    logger.info("%d items, %d already done, %d to run", len(items), len(items) - len(todo), len(todo))
+
+    service = ResearchJobService(
+        max_workers=parallel,
+        max_queued=max(len(todo), 1),
+        max_running_per_user=parallel,
+    )
+    hashes: dict[str, str] = {}
+    stage_seconds: dict[str, list[float]] = {}
+    counters: dict[str, float] = {}
+    outcomes = {SUCCEEDED: 0, FAILED: 0}
+    started = time.perf_counter()
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+
+        def finish(item: dict, state: str, report: str = "", error: Optional[str] = None,
+                   seconds: float = 0.0, metrics: Optional[dict] = None) -> None:
+            metrics = metrics or {}
+            record = {
+                "id": item["id"],
+                "query": item["query"],
+                "state": state,
+                "report_path": _write_report(reports_dir, item["id"], report) if report else None,
+                "error": error,
+                "seconds": round(seconds, 3),
+                "stages": {node: m.get("wall_s", 0.0) for node, m in metrics.items()},
+                "finished_at": time.time(),
+            }
+            _append_checkpoint(checkpoint, record)
+            outcomes[state] = outcomes.get(state, 0) + 1
+            for stage, secs in record["stages"].items():
+                stage_seconds.setdefault(stage, []).append(secs)
+            for name, value in summarize(metrics).items():
+                counters[name] = counters.get(name, 0) + value
+            logger.info("[%d/%d] %s %s%s", sum(outcomes.values()), len(todo), item["id"],
+                        state, f" ({error})" if error else "")
+
+        pending: dict[str, dict] = {}
+        try:
+            runnable = []
+            for item in todo:
+                if item["error"]:
+                    finish(item, FAILED, error=item["error"])
+                    continue
+                runnable.append((item, initial_state(item["query"], _pdf_handles(item["pdfs"], hashes))))
+
+            if config.PLAN_CACHE_ENABLED and runnable:
+                # Warm the plan cache so each job's planner step is a cache hit;
+                # without it every job simply plans for itself
+                try:
+                    plan_many([(state["query"], state["uploaded_files"]) for _, state in runnable])
+                except Exception as e:
+                    logger.warning("Plan warm-up failed, jobs will plan individually: %s", e)
+
+            for item, state in runnable:
+                pending[service.submit(state, user_id="batch")] = item
+
+            while pending:
+                time.sleep(_POLL_SECONDS)
+                for job_id in list(pending):
+                    job = service.get(job_id)
+                    if job is None or job["state"] not in FINISHED_STATES:
+                        continue
+                    item = pending.pop(job_id)
+                    ok = job["state"] == SUCCEEDED and bool(job["report"])
+                    finish(
+                        item,
+                        SUCCEEDED if ok else FAILED,
+                        report=job["report"] if ok else "",
+                        error=None if ok else (job["error"] or f"job {job['state']} without a report"),
+                        seconds=(job["finished_at"] or 0) - (job["started_at"] or 0),
+                        metrics=job["metrics"],
+                    )
+        except KeyboardInterrupt:
+            logger.warning("Interrupted; %d finished items are checkpointed", sum(outcomes.values()))
+            raise
+        finally:
+            service.shutdown(cancel=True)
+
+    elapsed = time.perf_counter() - started
+    ran = outcomes[SUCCEEDED] + outcomes[FAILED]
+    return {
+        "items": len(items),
+        "skipped": len(items) - len(todo),
+        "succeeded": outcomes[SUCCEEDED],
+        "failed": outcomes[FAILED],
+        "parallel": parallel,
+        "wall_s": round(elapsed, 2),
+        "queries_per_min": round(ran / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "stages": {
+            stage: {
+                "runs": len(secs),
+                "total_s": round(sum(secs), 2),
+                "mean_s": round(sum(secs) / len(secs), 3),
+                "max_s": round(max(secs), 3),
+            }
+            for stage, secs in sorted(stage_seconds.items())
+        },
+        # LLM tokens, searches, pages and plan sources, summed over every item
+        "counters": {name: round(value, 3) for name, value in counters.items()},
+        "output_dir": output_dir,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run research requests from a JSONL file")
+    parser.add_argument("input", help="JSONL file, one {query, pdfs?, id?} object per line")
+    parser.add_argument("--parallel", type=int, default=config.JOB_MAX_WORKERS,
+                        help="Requests run at once (default: JOB_MAX_WORKERS)")
+    parser.add_argument("--output-dir",
+                        help="Where reports and the checkpoint go "
+                             "(default: OUTPUT_DIR/batch/<input name>)")
+    parser.add_argument("--pdf-dir", help="Base folder for relative PDF paths "
+                                          "(default: the input file's folder)")
+    parser.add_argument("--no-retry-failed", action="store_true",
+                        help="On resume, skip items that failed last time too")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    output_dir = args.output_dir or os.path.join(
+        config.OUTPUT_DIR, "batch", os.path.splitext(os.path.basename(args.input))[0]
+    )
+    items = load_items(args.input, args.pdf_dir)
+    summary = run_batch(items, output_dir, max(1, args.parallel), not args.no_retry_failed)
+
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, indent=2)
+    print(json.dumps(summary, indent=2))
+    sys.exit(1 if summary["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
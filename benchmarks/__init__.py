@@ -0,0 +1 @@
+"""Benchmarks for Market Research GPT (not shipped with the package)."""
@@ -0,0 +1,78 @@
+"""
+Import-Time Benchmark
+
+Runs `python -X importtime -c "import <module>"` for the project's entry
+modules in fresh interpreters, reports cumulative import time, and asserts
+that heavy dependencies stay lazy — e.g. a worker that only needs
+`utils.pdf_parser` must not load the LLM stack.
+
+    python -m benchmarks.bench_import_time
+
+Exits non-zero if any module pulls in a dependency it must defer.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+# module → top-level packages it must NOT import eagerly
+LAZY_RULES: dict[str, list[str]] = {
+    "config": ["langchain_openai", "langgraph", "pdfplumber", "tavily", "numpy"],
+    "utils": ["langchain_openai", "langgraph", "pdfplumber", "tavily", "numpy"],
+    "utils.pdf_parser": ["langchain_openai", "langgraph", "openai", "pdfplumber", "tavily"],
+    "utils.tavily_client": ["langchain_openai", "langgraph", "pdfplumber", "tavily"],
+    "agents": ["langchain_openai", "langgraph", "pdfplumber", "tavily"],
+    "agents.graph": ["langchain_openai", "openai", "pdfplumber", "tavily"],
+}
+
+
+def measure(module: str) -> dict:
+    """Import `module` in a fresh interpreter and parse -X importtime output."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    imported: set[str] = set()
+    total_us = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if not cumulative.strip().isdigit():
+            continue  # Header row
+        stripped = name.strip()
+        imported.add(stripped.split(".")[0])
+        if stripped == module:
+            total_us = int(cumulative)
+
+    violations = sorted(dep for dep in LAZY_RULES.get(module, []) if dep in imported)
+    return {
+        "module": module,
+        "import_ms": round(total_us / 1000, 1),
+        "modules_loaded": len(imported),
+        "eager_heavy_deps": violations,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("modules", nargs="*", default=list(LAZY_RULES))
+    args = parser.parse_args()
+
+    results = [measure(m) for m in args.modules]
+    failed = [r for r in results if r["eager_heavy_deps"]]
+    print(json.dumps({"benchmark": "import_time", "results": results}, indent=2))
+
+    for r in failed:
+        print(
+            f"FAIL: importing {r['module']} eagerly loads {', '.join(r['eager_heavy_deps'])}",
+            file=sys.stderr,
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+PDF Memory Benchmark
+
+Compares peak RSS of parsing a large synthetic PDF the old way (whole upload
+read into a `bytes` object and wrapped in BytesIO) against the path-based
+flow (the document is opened from the upload working directory).
+
+Each mode runs in a fresh subprocess so peak RSS is measured in isolation.
+
+    python -m benchmarks.bench_pdf_memory --pages 100 --image-kb 2048
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic_pdf import write_synthetic_pdf
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / scale, 1)
+
+
+def _child(mode: str, path: str) -> None:
+    # Isolate the parse: no cache hits, no worker processes
+    os.environ["PDF_CACHE_ENABLED"] = "false"
+    os.environ["PDF_EXTRACTION_WORKERS"] = "1"
+
+    from utils.pdf_parser import PDFParser
+
+    parser = PDFParser()
+    baseline = _peak_rss_mb()
+    started = time.perf_counter()
+    if mode == "bytes":
+        with open(path, "rb") as fh:
+            data = fh.read()
+        result = parser.extract(pdf_bytes=data)
+    else:
+        result = parser.extract(file_path=path)
+    elapsed = time.perf_counter() - started
+
+    print(json.dumps({
+        "mode": mode,
+        "seconds": round(elapsed, 3),
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": _peak_rss_mb(),
+        "pages_processed": result["metadata"]["pages_processed"],
+    }))
+
+
+def run(pages: int, image_kb: int) -> dict:
+    """Generate the fixture, measure both modes, and return the report."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "synthetic.pdf")
+        with open(path, "wb") as fh:
+            write_synthetic_pdf(fh, pages, image_kb=image_kb)
+        size_mb = round(os.path.getsize(path) / (1024 * 1024), 1)
+
+        runs = {}
+        for mode in ("bytes", "path"):
+            out = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_pdf_memory", "--child", mode, path],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            runs[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    return {
+        "benchmark": "pdf_memory",
+        "pdf_pages": pages,
+        "pdf_size_mb": size_mb,
+        "before_bytes": runs["bytes"],
+        "after_path": runs["path"],
+        "peak_rss_saved_mb": round(
+            runs["bytes"]["peak_rss_mb"] - runs["path"]["peak_rss_mb"], 1
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--image-kb", type=int, default=2048,
+                        help="Per-page image padding (emulates scanned filings)")
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+    print(json.dumps(run(args.pages, args.image_kb), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,389 @@
+"""
+Pipeline Benchmark
+
+Runs the research pipeline fully offline (benchmarks.fakes stands in for
+OpenAI and Tavily with configurable latency) against synthetic PDFs and
+reports, as JSON:
+
+  - node_latency:  per-node wall time (planner, search_agent, pdf_agent per
+                   fixture size, writer), each node called in isolation
+  - end_to_end:    research_graph latency and time to first report token,
+                   with no PDF and with each fixture
+  - throughput:    sessions/second for N concurrent sessions, on threads
+                   (`.stream()`) and on one event loop (`.astream()`)
+  - memory:        peak RSS of research_graph, PDFParser and
+                   search_agent_node, each in a fresh subprocess
+
+All caches are disabled so every run does the full amount of work.
+
+    python -m benchmarks.bench_pipeline --pages 10,100,500 --concurrency 1,4,8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.synthetic_pdf import write_synthetic_pdf
+
+_QUERY = "Analyse NVIDIA's data-centre revenue growth and margin outlook"
+
+_UNCACHED = {
+    "PDF_CACHE_ENABLED": False,
+    "TAVILY_CACHE_ENABLED": False,
+    "PLAN_CACHE_ENABLED": False,
+    "REPORT_CACHE_ENABLED": False,
+    "PDF_PREEXTRACT_ENABLED": False,
+}
+
+
+def _configure(max_pages: int, fast_planner: bool) -> None:
+    """Switch off every cache and lift the page cap to the largest fixture."""
+    import config
+
+    for name, value in _UNCACHED.items():
+        setattr(config, name, value)
+    config.FAST_PLANNER_ENABLED = fast_planner
+    config.PDF_MAX_PAGES = max(config.PDF_MAX_PAGES, max_pages)
+
+
+def _peak_rss_mb() -> float:
+    # Linux ru_maxrss survives fork+exec, so a child would report the parent's
+    # peak; VmHWM is per address space and starts fresh in the child.
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / scale, 1)
+
+
+def _summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))]
+    return {
+        "runs": len(samples),
+        "mean_s": round(statistics.fmean(samples), 4),
+        "p50_s": round(statistics.median(samples), 4),
+        "p95_s": round(p95, 4),
+        "min_s": round(ordered[0], 4),
+        "max_s": round(ordered[-1], 4),
+    }
+
+
+def _timed(fn, *args) -> float:
+    started = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - started
+
+
+def _handle(path: str) -> dict:
+    """An uploaded_files entry pointing at a fixture on disk (as the registry would)."""
+    from utils.pdf_cache import hash_file
+
+    return {
+        "name": os.path.basename(path),
+        "doc_id": hash_file(path),
+        "path": path,
+        "size": os.path.getsize(path),
+    }
+
+
+def _run_session(query: str, uploaded_files: list[dict]) -> dict:
+    """One research run through the compiled graph; returns its timings."""
+    from agents.graph import get_research_graph
+    from agents.state import initial_state
+
+    started = time.perf_counter()
+    first_token = None
+    report_chars = 0
+    for mode, chunk in get_research_graph().stream(
+        initial_state(query, uploaded_files), stream_mode=["updates", "custom"]
+    ):
+        if mode == "custom" and chunk.get("token"):
+            if first_token is None:
+                first_token = time.perf_counter() - started
+        elif mode == "updates" and "writer" in chunk:
+            report_chars = len(chunk["writer"].get("report", ""))
+    return {
+        "seconds": time.perf_counter() - started,
+        "first_token_s": first_token,
+        "report_chars": report_chars,
+    }
+
+
+def _suffixed(state: dict, suffix: str) -> dict:
+    """Copy of a planned state with every query made unique by `suffix`."""
+    plan = state["plan"]
+    return {
+        **state,
+        "query": f"{state['query']} {suffix}",
+        "plan": {**plan, "search_queries": [f"{q} {suffix}" for q in plan["search_queries"]]},
+    }
+
+
+async def _arun_session(query: str, uploaded_files: list[dict]) -> dict:
+    """Async `_run_session`, over `.astream()`."""
+    from agents.graph import get_research_graph
+    from agents.state import initial_state
+
+    started = time.perf_counter()
+    first_token = None
+    async for mode, chunk in get_research_graph().astream(
+        initial_state(query, uploaded_files), stream_mode=["updates", "custom"]
+    ):
+        if mode == "custom" and chunk.get("token") and first_token is None:
+            first_token = time.perf_counter() - started
+    return {"seconds": time.perf_counter() - started, "first_token_s": first_token}
+
+
+# ── Sections ──────────────────────────────────────────────────────────────────
+
+
+def bench_nodes(fixtures: dict[int, str], repeats: int) -> dict:
+    from agents.orchestrator import planner_node
+    from agents.pdf_agent import pdf_agent_node
+    from agents.search_agent import search_agent_node
+    from agents.state import initial_state
+    from agents.writer_agent import writer_node
+
+    state = initial_state(_QUERY)
+    planned = {**state, **planner_node(state)}
+    searched = {**planned, **search_agent_node(planned)}
+
+    results = {
+        "planner": _summary([
+            _timed(planner_node, initial_state(f"{_QUERY} #{i}")) for i in range(repeats)
+        ]),
+        # Distinct queries per run so the in-flight/prefetch dedup never short-circuits
+        "search_agent": _summary([
+            _timed(search_agent_node, _suffixed(planned, f"#{i}")) for i in range(repeats)
+        ]),
+        "writer": _summary([_timed(writer_node, searched) for _ in range(repeats)]),
+    }
+    for pages, path in fixtures.items():
+        pdf_state = {**planned, "uploaded_files": [_handle(path)]}
+        results[f"pdf_agent_{pages}p"] = _summary([
+            _timed(pdf_agent_node, pdf_state) for _ in range(repeats)
+        ])
+    return results
+
+
+def bench_end_to_end(fixtures: dict[int, str], repeats: int) -> dict:
+    cases = {"no_pdf": []}
+    cases.update({f"pdf_{pages}p": [_handle(path)] for pages, path in fixtures.items()})
+
+    results = {}
+    for name, uploaded in cases.items():
+        runs = [_run_session(f"{_QUERY} [{name} #{i}]", uploaded) for i in range(repeats)]
+        results[name] = {
+            **_summary([r["seconds"] for r in runs]),
+            "first_token": _summary([r["first_token_s"] for r in runs if r["first_token_s"]]),
+            "report_chars": runs[-1]["report_chars"],
+        }
+    return results
+
+
+def bench_throughput(levels: list[int], uploaded: list[dict]) -> dict:
+    results = {}
+    for n in levels:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            runs = list(pool.map(
+                lambda i: _run_session(f"{_QUERY} [concurrency {n} #{i}]", uploaded),
+                range(n),
+            ))
+        wall = time.perf_counter() - started
+        results[str(n)] = {
+            "sessions": n,
+            "wall_s": round(wall, 3),
+            "sessions_per_s": round(n / wall, 3),
+            "latency": _summary([r["seconds"] for r in runs]),
+        }
+    return results
+
+
+def bench_throughput_async(levels: list[int], uploaded: list[dict]) -> dict:
+    async def _level(n: int) -> list[dict]:
+        return await asyncio.gather(*(
+            _arun_session(f"{_QUERY} [async concurrency {n} #{i}]", uploaded) for i in range(n)
+        ))
+
+    results = {}
+    for n in levels:
+        started = time.perf_counter()
+        runs = asyncio.run(_level(n))
+        wall = time.perf_counter() - started
+        results[str(n)] = {
+            "sessions": n,
+            "wall_s": round(wall, 3),
+            "sessions_per_s": round(n / wall, 3),
+            "latency": _summary([r["seconds"] for r in runs]),
+        }
+    return results
+
+
+def bench_memory(fixtures: dict[int, str], args: argparse.Namespace) -> dict:
+    targets = [("search_agent_node", "")]
+    for pages, path in fixtures.items():
+        targets.append((f"pdf_parser_{pages}p", path))
+        targets.append((f"research_graph_{pages}p", path))
+
+    results = {}
+    for name, path in targets:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_pipeline",
+             "--llm-latency", str(args.llm_latency),
+             "--llm-tokens-per-s", str(args.llm_tokens_per_s),
+             "--tavily-latency", str(args.tavily_latency),
+             "--pages", ",".join(str(p) for p in fixtures),
+             "--child-memory", name, path or "-"],
+            check=True,
+            capture_output=True,
+            text=True,
+        )
+        results[name] = json.loads(out.stdout.strip().splitlines()[-1])
+    return results
+
+
+def _child_memory(target: str, path: str) -> None:
+    """Measure one component's peak RSS in this (fresh) process."""
+    from agents.search_agent import search_agent_node
+    from utils.pdf_parser import PDFParser
+
+    baseline = _peak_rss_mb()
+    started = time.perf_counter()
+    if target == "search_agent_node":
+        search_agent_node({"query": _QUERY, "plan": {"search_queries": [
+            _QUERY, f"{_QUERY} latest results", f"{_QUERY} analyst outlook"]}})
+    elif target.startswith("pdf_parser_"):
+        PDFParser().extract(file_path=path)
+    else:
+        _run_session(_QUERY, [_handle(path)])
+
+    print(json.dumps({
+        "seconds": round(time.perf_counter() - started, 3),
+        "baseline_rss_mb": baseline,
+        "peak_rss_mb": _peak_rss_mb(),
+        "delta_rss_mb": round(_peak_rss_mb() - baseline, 1),
+    }))
+
+
+# ── Entry point ───────────────────────────────────────────────────────────────
+
+
+def _git_revision() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args: argparse.Namespace, fixtures: dict[int, str]) -> dict:
+    from benchmarks.fakes import offline_services
+
+    sections = set(args.sections.split(","))
+    report = {
+        "benchmark": "pipeline",
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "settings": {
+            "llm_first_token_latency_s": args.llm_latency,
+            "llm_tokens_per_s": args.llm_tokens_per_s,
+            "tavily_latency_s": args.tavily_latency,
+            "fast_planner": args.fast_planner,
+            "pdf_pages": sorted(fixtures),
+            "repeats": args.repeats,
+        },
+    }
+
+    with offline_services(
+        llm_first_token_latency=args.llm_latency,
+        llm_tokens_per_second=args.llm_tokens_per_s,
+        tavily_latency=args.tavily_latency,
+    ) as (llm, tavily):
+        if "nodes" in sections:
+            report["node_latency"] = bench_nodes(fixtures, args.repeats)
+        if "e2e" in sections:
+            report["end_to_end"] = bench_end_to_end(fixtures, args.repeats)
+        if "throughput" in sections:
+            smallest = [_handle(fixtures[min(fixtures)])] if fixtures else []
+            report["throughput"] = bench_throughput(args.concurrency, smallest)
+            report["throughput_async"] = bench_throughput_async(args.concurrency, smallest)
+        report["fake_calls"] = {"llm": llm.calls, "tavily": tavily.calls}
+
+    if "memory" in sections:
+        report["memory"] = bench_memory(fixtures, args)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", default="10,100,500",
+                        help="Comma-separated synthetic PDF sizes")
+    parser.add_argument("--concurrency", default="1,4,8",
+                        help="Comma-separated concurrent session counts")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--sections", default="nodes,e2e,throughput,memory")
+    parser.add_argument("--llm-latency", type=float, default=0.5,
+                        help="Fake LLM time to first token (seconds)")
+    parser.add_argument("--llm-tokens-per-s", type=float, default=200.0)
+    parser.add_argument("--tavily-latency", type=float, default=0.8,
+                        help="Fake Tavily round-trip (seconds)")
+    parser.add_argument("--fast-planner", action="store_true",
+                        help="Keep the local fast-path planner enabled")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--child-memory", nargs=2, metavar=("TARGET", "PATH"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    args.concurrency = [int(n) for n in args.concurrency.split(",") if n]
+    pages = [int(n) for n in args.pages.split(",") if n]
+
+    _configure(max(pages, default=0), args.fast_planner)
+
+    if args.child_memory:
+        from benchmarks.fakes import offline_services
+
+        with offline_services(
+            llm_first_token_latency=args.llm_latency,
+            llm_tokens_per_second=args.llm_tokens_per_s,
+            tavily_latency=args.tavily_latency,
+        ):
+            _child_memory(*args.child_memory)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fixtures = {}
+        for n in pages:
+            path = os.path.join(tmp, f"synthetic_{n}p.pdf")
+            with open(path, "wb") as fh:
+                write_synthetic_pdf(fh, n)
+            fixtures[n] = path
+        report = run(args, fixtures)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fh:
+            fh.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Offline Stand-ins for OpenAI and Tavily
+
+Drop-in fakes with configurable latency so the research graph can be
+benchmarked without API keys or network access.
+
+  - FakeChatModel:   a LangChain chat model that answers planner prompts with
+                     a JSON plan and everything else with a canned report,
+                     streaming tokens at a fixed rate.
+  - FakeTavilyClient: returns deterministic search results after a delay.
+
+Both have real async paths (asyncio.sleep), so `.astream()` runs are
+measured without a thread per request.
+
+`offline_services(...)` patches both into the pipeline for the duration of a
+`with` block.
+"""
+
+import asyncio
+import contextlib
+import json
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, Optional
+from unittest import mock
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_REPORT_WORDS = (
+    "## Executive Summary\n\nRevenue grew 12% YoY on strong data-centre demand, "
+    "while gross margin expanded 180bps QoQ. ## Key Findings\n\n- EBITDA margin "
+    "reached 38% - Guidance implies a 9% CAGR through FY26 - Net cash position "
+    "supports buybacks. ## Risk Factors\n\nSupply constraints and export "
+    "controls remain key risks. This report is for informational purposes only "
+    "and does not constitute investment advice."
+).split(" ")
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model stand-in with a fixed time-to-first-token and token rate."""
+
+    first_token_latency: float = 0.5
+    tokens_per_second: float = 200.0
+    report_tokens: int = 300
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark-chat"
+
+    @staticmethod
+    def _plan(request: str) -> dict:
+        query = request.split("\n", 1)[0].replace("Research query:", "").strip()
+        return {
+            "goal": query,
+            "use_pdf_agent": "Uploaded PDF files" in request,
+            "pdf_instructions": f"Extract figures relevant to: {query}",
+            "use_search_agent": True,
+            "search_queries": [query, f"{query} latest results", f"{query} analyst outlook"],
+            "writer_instructions": "Write a comprehensive financial analysis",
+        }
+
+    def _reply(self, messages: list[BaseMessage]) -> list[str]:
+        system = str(messages[0].content) if messages else ""
+        human = str(messages[-1].content) if messages else ""
+        if system.startswith("You are a Market Research Planner"):
+            if "several numbered research requests" in system:
+                blocks = re.split(r"^Request \d+:\n", human, flags=re.MULTILINE)[1:]
+                plans = [self._plan(b) for b in blocks]
+                return [json.dumps([dict(p, index=i, query=p["goal"]) for i, p in enumerate(plans, 1)])]
+            return [json.dumps(self._plan(human))]
+        words = (_REPORT_WORDS * (self.report_tokens // len(_REPORT_WORDS) + 1))[: self.report_tokens]
+        return [w + " " for w in words]
+
+    @staticmethod
+    def _usage(messages: list[BaseMessage], completion_tokens: int) -> dict:
+        # Whitespace words stand in for tokens; close enough for accounting
+        prompt_tokens = sum(len(str(m.content).split()) for m in messages)
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        tokens = self._reply(messages)
+        time.sleep(self.first_token_latency + len(tokens) / self.tokens_per_second)
+        message = AIMessage(
+            content="".join(tokens),
+            usage_metadata=self._usage(messages, sum(len(t.split()) for t in tokens)),
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self.calls += 1
+        time.sleep(self.first_token_latency)
+        tokens = self._reply(messages)
+        for token in tokens:
+            time.sleep(1.0 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        # Usage arrives on a final empty chunk, as with OpenAI's stream_usage
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, len(tokens)))
+        )
+
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        self.calls += 1
+        tokens = self._reply(messages)
+        await asyncio.sleep(self.first_token_latency + len(tokens) / self.tokens_per_second)
+        message = AIMessage(
+            content="".join(tokens),
+            usage_metadata=self._usage(messages, sum(len(t.split()) for t in tokens)),
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(
+        self, messages, stop=None, run_manager=None, **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self.calls += 1
+        await asyncio.sleep(self.first_token_latency)
+        tokens = self._reply(messages)
+        for token in tokens:
+            await asyncio.sleep(1.0 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages, len(tokens)))
+        )
+
+
+class FakeTavilyClient:
+    """TavilyClient stand-in returning deterministic results after `latency` seconds."""
+
+    def __init__(self, latency: float = 0.8):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, max_results: int = 5, search_depth: str = "advanced", **_: Any) -> dict:
+        time.sleep(self.latency)
+        return self.respond(query, max_results)
+
+    def respond(self, query: str, max_results: int = 5) -> dict:
+        """The canned response for `query` (counted as one call, no delay)."""
+        with self._lock:
+            self.calls += 1
+        slug = "-".join(query.lower().split())[:60]
+        return {
+            "results": [
+                {
+                    "title": f"{query} — source {i + 1}",
+                    "url": f"https://example.com/{slug}/{i}",
+                    "content": f"Analysts note {query} shows revenue up {10 + i}% YoY "
+                               f"with margins of {30 + i}% and guidance raised.",
+                    "score": round(1.0 - i * 0.1, 2),
+                }
+                for i in range(max_results)
+            ]
+        }
+
+
+class FakeAsyncTavilyClient:
+    """AsyncTavilyClient stand-in sharing a FakeTavilyClient's latency and call count."""
+
+    def __init__(self, sync: FakeTavilyClient):
+        self.sync = sync
+
+    async def search(self, query: str, max_results: int = 5, **_: Any) -> dict:
+        await asyncio.sleep(self.sync.latency)
+        return self.sync.respond(query, max_results)
+
+
+@contextlib.contextmanager
+def offline_services(
+    llm_first_token_latency: float = 0.5,
+    llm_tokens_per_second: float = 200.0,
+    report_tokens: int = 300,
+    tavily_latency: float = 0.8,
+    llm: Optional[FakeChatModel] = None,
+    tavily: Optional[FakeTavilyClient] = None,
+):
+    """
+    Route every LLM and Tavily call in the pipeline to offline fakes.
+
+    Yields:
+        (llm, tavily) — the fake instances, for call counts.
+    """
+    import config
+    import agents.orchestrator
+    import agents.writer_agent
+    from utils.tavily_client import TavilySearch
+
+    llm = llm or FakeChatModel(
+        first_token_latency=llm_first_token_latency,
+        tokens_per_second=llm_tokens_per_second,
+        report_tokens=report_tokens,
+    )
+    tavily = tavily or FakeTavilyClient(latency=tavily_latency)
+
+    atavily = FakeAsyncTavilyClient(tavily)
+
+    def fake_get_llm(*_args, **_kwargs):
+        return llm
+
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(mock.patch.object(config, "TAVILY_API_KEY", "offline"))
+        for module in (agents.orchestrator, agents.writer_agent):
+            stack.enter_context(mock.patch.object(module, "get_llm", fake_get_llm))
+            stack.enter_context(mock.patch.object(module, "get_async_llm", fake_get_llm))
+        stack.enter_context(
+            mock.patch.object(TavilySearch, "client", new=property(lambda self: tavily))
+        )
+        stack.enter_context(
+            mock.patch.object(TavilySearch, "aclient", new=property(lambda self: atavily))
+        )
+        yield llm, tavily
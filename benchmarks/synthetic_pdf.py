@@ -0,0 +1,113 @@
+"""
+Synthetic PDF Fixtures
+
+Writes self-contained PDFs with text lines and a ruled table on every page,
+using nothing but the standard library, so benchmarks don't need sample
+filings.  An optional uncompressed image per page pads the file to emulate
+large scanned reports.
+"""
+
+from typing import BinaryIO
+
+_FONT_LINE_HEIGHT = 12
+
+
+def _page_content(page_no: int, lines: int) -> bytes:
+    text = " ".join(
+        f"(Page {page_no} line {j}: revenue grew {j % 17 + 1}% YoY, "
+        f"EBITDA margin {20 + j % 9}.{j % 10}%) '"
+        for j in range(lines)
+    )
+    parts = [f"BT /F1 9 Tf 40 790 Td {_FONT_LINE_HEIGHT} TL {text} ET"]
+
+    # 4x3 ruled table near the bottom of the page
+    rows, cols, top, left, row_h, col_w = 4, 3, 200, 40, 20, 150
+    parts.append("0.5 w")
+    for r in range(rows + 1):
+        y = top - r * row_h
+        parts.append(f"{left} {y} m {left + cols * col_w} {y} l S")
+    for c in range(cols + 1):
+        x = left + c * col_w
+        parts.append(f"{x} {top} m {x} {top - rows * row_h} l S")
+    cells = []
+    for r in range(rows):
+        for c in range(cols):
+            label = ["Metric", "FY23", "FY24"][c] if r == 0 else (
+                f"Segment {r}" if c == 0 else f"{(page_no * 7 + r * 3 + c) % 900 + 100}.{r}"
+            )
+            cells.append(f"1 0 0 1 {left + 5 + c * col_w} {top - 14 - r * row_h} Tm ({label}) Tj")
+    parts.append("BT /F1 9 Tf " + " ".join(cells) + " ET")
+    return "\n".join(parts).encode()
+
+
+def write_synthetic_pdf(
+    out: BinaryIO,
+    pages: int,
+    lines_per_page: int = 45,
+    image_kb: int = 0,
+) -> None:
+    """
+    Stream a synthetic PDF to a binary file object.
+
+    Args:
+        out: Writable binary file object.
+        pages: Number of pages.
+        lines_per_page: Text lines per page.
+        image_kb: Size of an uncompressed greyscale image drawn on each page
+            (0 for none); use it to emulate large scanned filings.
+    """
+    per_page = 3 if image_kb else 2
+    font_id = 3 + per_page * pages
+    offsets: list[int] = []
+    start = out.tell()
+
+    def write_obj(obj_id: int, body: bytes) -> None:
+        offsets.append(out.tell() - start)
+        out.write(f"{obj_id} 0 obj\n".encode() + body + b"\nendobj\n")
+
+    out.write(b"%PDF-1.4\n")
+    write_obj(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+    kids = " ".join(f"{3 + per_page * i} 0 R" for i in range(pages))
+    write_obj(2, f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+
+    side = int((image_kb * 1024) ** 0.5) if image_kb else 0
+    for i in range(pages):
+        page_id = 3 + per_page * i
+        content = _page_content(i + 1, lines_per_page)
+        xobject = ""
+        if image_kb:
+            xobject = f" /XObject << /Im1 {page_id + 2} 0 R >>"
+            content += b"\nq 120 0 0 120 440 40 cm /Im1 Do Q"
+        write_obj(
+            page_id,
+            (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Resources << /Font << /F1 {font_id} 0 R >>{xobject} >> "
+                f"/Contents {page_id + 1} 0 R >>"
+            ).encode(),
+        )
+        write_obj(
+            page_id + 1,
+            b"<< /Length %d >>\nstream\n" % len(content) + content + b"\nendstream",
+        )
+        if image_kb:
+            pixels = bytes((i + k) % 256 for k in range(side)) * side
+            write_obj(
+                page_id + 2,
+                (
+                    f"<< /Type /XObject /Subtype /Image /Width {side} /Height {side} "
+                    f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Length {len(pixels)} >>\nstream\n"
+                ).encode()
+                + pixels
+                + b"\nendstream",
+            )
+
+    write_obj(font_id, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    xref_at = out.tell() - start
+    out.write(f"xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n".encode())
+    for off in offsets:
+        out.write(f"{off:010d} 00000 n \n".encode())
+    out.write(
+        f"trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\nstartxref\n{xref_at}\n%%EOF\n".encode()
+    )
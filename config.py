@@ -27,19 +27,93 @@ if LANGSMITH_API_KEY:
 # ── LLM Settings ─────────────────────────────────────────────────────────────
 LLM_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o")
 LLM_TEMPERATURE = float(os.getenv("OPENAI_TEMPERATURE", "0.3"))
+LLM_MAX_CONNECTIONS = 20  # Shared httpx pool across all LLM clients
+LLM_MAX_KEEPALIVE_CONNECTIONS = 10
+LLM_TIMEOUT = 120.0  # Seconds
 
 # ── Tavily Search Settings ────────────────────────────────────────────────────
 TAVILY_SEARCH_DEPTH = "advanced"  # "basic" or "advanced"
 TAVILY_MAX_RESULTS = 5
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", "4"))
+TAVILY_CACHE_ENABLED = os.getenv("TAVILY_CACHE_ENABLED", "true").lower() == "true"
+TAVILY_CACHE_TTL = int(os.getenv("TAVILY_CACHE_TTL", "3600"))  # Seconds an entry is fresh
+TAVILY_CACHE_STALE_TTL = int(os.getenv("TAVILY_CACHE_STALE_TTL", "86400"))  # Served stale until
 
 # ── PDF Settings ──────────────────────────────────────────────────────────────
 PDF_MAX_PAGES = 100
 PDF_TABLE_EXTRACTION = True
+# Process-pool extraction: documents with at least PDF_PARALLEL_MIN_PAGES pages
+# are split into page ranges on one shared pool of PDF_EXTRACTION_WORKERS
+# processes (a cap for the whole process, not per document).
+PDF_EXTRACTION_WORKERS = int(
+    os.getenv("PDF_EXTRACTION_WORKERS", str(min(8, os.cpu_count() or 1)))
+)
+PDF_PARALLEL_MIN_PAGES = 20
+PDF_EXTRACTION_TIMEOUT = 300  # Seconds per document before falling back to serial
+# Characters of PDF text + tables handed to the writer per query.  With
+# retrieval on, whole documents are parsed and the most relevant chunks are
+# packed into this budget; with it off, parsing stops once each file's share
+# of the budget is reached.  0 disables the limit.
+PDF_CHAR_BUDGET = int(os.getenv("PDF_CHAR_BUDGET", "12000"))
+PDF_RETRIEVAL_ENABLED = os.getenv("PDF_RETRIEVAL_ENABLED", "true").lower() == "true"
+PDF_RETRIEVAL_TOP_K = 8  # Chunks considered per document
+PDF_CHUNK_CHARS = 1500
+PDF_CHUNK_OVERLAP = 200
+PDF_INDEX_CACHE_ENTRIES = 32  # Per-document BM25 indices kept in memory
+PDF_MAX_CONCURRENT_FILES = int(os.getenv("PDF_MAX_CONCURRENT_FILES", "4"))
+PDF_CACHE_ENABLED = os.getenv("PDF_CACHE_ENABLED", "true").lower() == "true"
+PDF_CACHE_MEMORY_ENTRIES = 32  # Parsed documents kept in the in-process LRU
+PDF_CACHE_DISK_MAX_MB = 512  # Size cap for the on-disk tier
+
+# ── Upload Settings ───────────────────────────────────────────────────────────
+UPLOAD_REGISTRY_MAX_MB = 2048  # Total size of uploads kept before LRU eviction
+# Start extracting PDFs in the background as soon as they are uploaded
+PDF_PREEXTRACT_ENABLED = os.getenv("PDF_PREEXTRACT_ENABLED", "true").lower() == "true"
+DOCUMENT_STORE_MAX_ENTRIES = 32  # Finished pre-extractions kept in memory
 
 # ── Agent Settings ────────────────────────────────────────────────────────────
 PLANNER_MAX_SUBTASKS = 5
+FAST_PLANNER_ENABLED = os.getenv("FAST_PLANNER_ENABLED", "true").lower() == "true"
+FAST_PLANNER_MIN_CONFIDENCE = 0.7  # Below this the LLM planner is used
+PLANNER_BATCH_SIZE = int(os.getenv("PLANNER_BATCH_SIZE", "8"))  # Queries per batched planner call
+PLANNER_BATCH_CONCURRENCY = 4  # Batched planner calls in flight at once
+# Search the raw query at graph entry, in parallel with the planner
+SPECULATIVE_SEARCH_ENABLED = os.getenv("SPECULATIVE_SEARCH_ENABLED", "true").lower() == "true"
+PLAN_CACHE_ENABLED = os.getenv("PLAN_CACHE_ENABLED", "true").lower() == "true"
+PLAN_CACHE_TTL = int(os.getenv("PLAN_CACHE_TTL", "3600"))  # Seconds
+PLAN_CACHE_MAX_ENTRIES = 256
+REPORT_CACHE_ENABLED = os.getenv("REPORT_CACHE_ENABLED", "true").lower() == "true"
+REPORT_CACHE_MAX_ENTRIES = 500  # Stored reports kept under REPORT_CACHE_DIR
 WRITER_MAX_TOKENS = 4096
+# Writer context is packed to a token budget (see agents/context_packer.py)
+WRITER_CONTEXT_WINDOW = int(os.getenv("WRITER_CONTEXT_WINDOW", "128000"))  # Model context, tokens
+WRITER_CONTEXT_TOKENS = int(os.getenv("WRITER_CONTEXT_TOKENS", "6000"))  # Research context cap
+WRITER_PDF_SHARE = 0.6  # Budget share for PDF content when search results exist too
+WRITER_SNIPPET_MAX_TOKENS = 200  # Longer search snippets are cut to this
+WRITER_MIN_ITEM_TOKENS = 48  # Smaller leftovers aren't worth a cut-down item
+
+# ── Research Jobs ─────────────────────────────────────────────────────────────
+# Research runs execute on a shared worker pool (agents.jobs) rather than on
+# the caller's thread.
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", "4"))  # Concurrent graph runs
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "32"))  # Waiting jobs before rejecting
+JOB_MAX_RUNNING_PER_USER = int(os.getenv("JOB_MAX_RUNNING_PER_USER", "1"))
+JOB_HISTORY_MAX_ENTRIES = 200  # Finished jobs kept for polling
+JOB_POLL_SECONDS = 0.5  # UI refresh interval while a job is active
+
+# ── Metrics & Tracing ─────────────────────────────────────────────────────────
+# Per-node metrics always land in state["metrics"]; with export on, each node
+# run is also appended to TRACE_EXPORT_PATH as an OpenTelemetry-style span.
+TRACE_EXPORT_ENABLED = os.getenv("TRACE_EXPORT_ENABLED", "false").lower() == "true"
 
 # ── Output ────────────────────────────────────────────────────────────────────
+# Created on first write by whichever cache or store needs it, so importing
+# config has no filesystem side effects.
 OUTPUT_DIR = os.path.join(os.path.dirname(__file__), "output")
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+PDF_CACHE_DIR = os.path.join(OUTPUT_DIR, "pdf_cache")
+TAVILY_CACHE_PATH = os.path.join(OUTPUT_DIR, "tavily_cache.sqlite3")
+UPLOAD_DIR = os.path.join(OUTPUT_DIR, "uploads")
+REPORT_CACHE_DIR = os.path.join(OUTPUT_DIR, "reports")
+TRACE_EXPORT_PATH = os.getenv(
+    "TRACE_EXPORT_PATH", os.path.join(OUTPUT_DIR, "traces", "spans.jsonl")
+)
@@ -0,0 +1,101 @@
+"""
+The PDF and search branches run in the same super-step, so a run takes about
+max(pdf, search) rather than their sum, and both statuses survive the join.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+from agents import graph as graph_module
+from agents.state import initial_state
+
+BRANCH_SECONDS = 0.5
+PLAN = {
+    "goal": "test",
+    "use_pdf_agent": True,
+    "pdf_instructions": "",
+    "use_search_agent": True,
+    "search_queries": ["test"],
+    "writer_instructions": "",
+}
+
+
+def _planner(state):
+    return {"plan": dict(PLAN), "status": {"planner": "done"}}
+
+
+def _speculative(state):
+    return {"status": {"speculative_search": "skipped"}}
+
+
+def _pdf(state):
+    time.sleep(BRANCH_SECONDS)
+    return {"pdf_content": "pdf", "status": {"pdf_agent": "done"}}
+
+
+def _search(state):
+    time.sleep(BRANCH_SECONDS)
+    return {"search_results": [{"url": "u"}], "status": {"search_agent": "done"}}
+
+
+def _writer(state):
+    return {"report": "report", "status": {"writer": "done"}}
+
+
+async def _apdf(state):
+    await asyncio.sleep(BRANCH_SECONDS)
+    return {"pdf_content": "pdf", "status": {"pdf_agent": "done"}}
+
+
+async def _asearch(state):
+    await asyncio.sleep(BRANCH_SECONDS)
+    return {"search_results": [{"url": "u"}], "status": {"search_agent": "done"}}
+
+
+def _async(fn):
+    async def run(state):
+        return fn(state)
+
+    return run
+
+
+@pytest.fixture
+def research_graph(monkeypatch):
+    stubs = {
+        "speculative_search_node": _speculative,
+        "aspeculative_search_node": _async(_speculative),
+        "planner_node": _planner,
+        "aplanner_node": _async(_planner),
+        "pdf_agent_node": _pdf,
+        "apdf_agent_node": _apdf,
+        "search_agent_node": _search,
+        "asearch_agent_node": _asearch,
+        "writer_node": _writer,
+        "awriter_node": _async(_writer),
+    }
+    for name, stub in stubs.items():
+        monkeypatch.setattr(graph_module, name, stub)
+    return graph_module.build_research_graph()
+
+
+def _check(result, elapsed):
+    # Sequential branches would take 2 × BRANCH_SECONDS
+    assert BRANCH_SECONDS <= elapsed < BRANCH_SECONDS * 1.5
+    assert {"pdf_agent", "search_agent", "writer"} <= result["status"].keys()
+    assert result["pdf_content"] == "pdf"
+    assert result["search_results"] == [{"url": "u"}]
+    assert result["report"] == "report"
+
+
+def test_branches_run_in_parallel(research_graph):
+    started = time.perf_counter()
+    result = research_graph.invoke(initial_state("test"))
+    _check(result, time.perf_counter() - started)
+
+
+def test_branches_run_in_parallel_async(research_graph):
+    started = time.perf_counter()
+    result = asyncio.run(research_graph.ainvoke(initial_state("test")))
+    _check(result, time.perf_counter() - started)
@@ -0,0 +1,171 @@
+"""
+ResearchJobService admission, per-user fairness, cancellation and history,
+with `stream_research` replaced by stub streams the test releases by hand.
+"""
+
+import threading
+import time
+
+import pytest
+
+from agents import jobs
+from agents.jobs import CANCELLED, QUEUED, RUNNING, SUCCEEDED, JobRejected, ResearchJobService
+from agents.state import initial_state
+
+TIMEOUT = 5
+
+
+class StubStreams:
+    """Each stream emits a planner update, waits for its query's gate, then the report."""
+
+    def __init__(self):
+        self.gates: dict[str, threading.Event] = {}
+        self.started: list[str] = []
+        self.closed: list[str] = []
+        self._released_all = False
+        self._lock = threading.Lock()
+
+    def gate(self, query: str) -> threading.Event:
+        with self._lock:
+            if query not in self.gates:
+                self.gates[query] = threading.Event()
+                if self._released_all:
+                    self.gates[query].set()
+            return self.gates[query]
+
+    def release(self, *queries: str) -> None:
+        for query in queries:
+            self.gate(query).set()
+
+    def release_all(self) -> None:
+        with self._lock:
+            self._released_all = True
+            for gate in self.gates.values():
+                gate.set()
+
+    def __call__(self, state: dict):
+        query = state["query"]
+        self.started.append(query)
+        try:
+            yield "updates", {"planner": {"status": {"planner": "done"}}}
+            self.gate(query).wait(TIMEOUT)
+            yield "custom", {"node": "writer", "token": "partial "}
+            yield "updates", {"writer": {"report": f"report: {query}", "status": {"writer": "done"}}}
+        finally:
+            self.closed.append(query)
+
+
+@pytest.fixture
+def streams(monkeypatch):
+    stubs = StubStreams()
+    monkeypatch.setattr(jobs, "stream_research", stubs)
+    return stubs
+
+
+@pytest.fixture
+def make_service(streams):
+    services = []
+
+    def make(**kwargs):
+        service = ResearchJobService(**kwargs)
+        services.append(service)
+        return service
+
+    yield make
+    streams.release_all()
+    for service in services:
+        service.shutdown(cancel=True)
+
+
+def _until(condition):
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def _states(service, job_ids):
+    return [service.get(job_id)["state"] for job_id in job_ids]
+
+
+def test_full_queue_rejects(streams, make_service):
+    service = make_service(max_workers=1, max_queued=1, max_running_per_user=1)
+    running = service.submit(initial_state("a"))
+    queued = service.submit(initial_state("b"))
+    with pytest.raises(JobRejected):
+        service.submit(initial_state("c"))
+    assert _states(service, [running, queued]) == [RUNNING, QUEUED]
+    assert service.get(queued)["queue_position"] == 1
+
+    streams.release("a", "b")
+    assert service.wait(queued, TIMEOUT)["state"] == SUCCEEDED
+    service.submit(initial_state("c"))  # Room again
+
+
+def test_per_user_limit(streams, make_service):
+    service = make_service(max_workers=4, max_queued=10, max_running_per_user=1)
+    alice = [service.submit(initial_state(f"alice {i}"), "alice") for i in range(2)]
+    bob = service.submit(initial_state("bob"), "bob")
+    # A free worker is left idle rather than run alice's second job
+    assert _states(service, alice + [bob]) == [RUNNING, QUEUED, RUNNING]
+
+    streams.release("alice 0")
+    assert service.wait(alice[0], TIMEOUT)["state"] == SUCCEEDED
+    _until(lambda: service.get(alice[1])["state"] == RUNNING)
+
+
+def test_free_worker_goes_to_user_with_fewest_running(streams, make_service):
+    service = make_service(max_workers=2, max_queued=10, max_running_per_user=2)
+    alice = [service.submit(initial_state(f"alice {i}"), "alice") for i in range(3)]
+    bob = service.submit(initial_state("bob"), "bob")
+    assert _states(service, alice + [bob]) == [RUNNING, RUNNING, QUEUED, QUEUED]
+
+    # alice still has one job running, bob none: bob's newer job goes first
+    streams.release("alice 0")
+    service.wait(alice[0], TIMEOUT)
+    _until(lambda: service.get(bob)["state"] == RUNNING)
+    assert service.get(alice[2])["state"] == QUEUED
+
+
+def test_cancel_running_job_stops_at_next_event(streams, make_service):
+    service = make_service(max_workers=1, max_queued=10, max_running_per_user=1)
+    job_id = service.submit(initial_state("a"))
+    _until(lambda: service.get(job_id)["current_node"] == "planner")
+
+    assert service.cancel(job_id)
+    streams.release("a")
+    job = service.wait(job_id, TIMEOUT)
+    assert job["state"] == CANCELLED
+    assert job["status"] == {"planner": "done"}
+    assert job["report"] == ""  # Nothing after the planner update was recorded
+    assert streams.closed == ["a"]
+    assert not service.cancel(job_id)  # Already finished
+
+
+def test_cancel_queued_job_never_starts(streams, make_service):
+    service = make_service(max_workers=1, max_queued=10, max_running_per_user=1)
+    first = service.submit(initial_state("a"))
+    second = service.submit(initial_state("b"))
+    assert service.cancel(second)
+    assert service.get(second)["state"] == CANCELLED
+
+    streams.release("a")
+    service.wait(first, TIMEOUT)
+    assert streams.started == ["a"]
+
+
+def test_history_eviction(streams, make_service):
+    service = make_service(max_workers=1, max_queued=10, max_running_per_user=1, history_entries=2)
+    streams.release("q0", "q1", "q2", "q3")
+    finished = []
+    for i in range(4):
+        finished.append(service.submit(initial_state(f"q{i}")))
+        assert service.wait(finished[-1], TIMEOUT)["state"] == SUCCEEDED
+
+    running = service.submit(initial_state("running"))
+    _until(lambda: service.get(running)["state"] == RUNNING)
+
+    # The two oldest finished jobs are forgotten; running jobs never are
+    assert [service.get(job_id) is None for job_id in finished] == [True, True, False, False]
+    assert [job["job_id"] for job in service.list_jobs()] == finished[2:] + [running]
+    assert service.get(finished[3])["report"] == "report: q3"
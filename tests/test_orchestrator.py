@@ -0,0 +1,127 @@
+"""
+Batched planning: each plan in a batched planner reply must land on the
+request it was written for, and anything unusable falls back to the default
+plan for that request alone.
+"""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import config
+from agents import orchestrator
+from agents.orchestrator import _default_plan, _parse_plans, plan_many
+
+QUERIES = ["NVIDIA data-centre outlook", "AMD margin trends", "Intel foundry losses"]
+
+
+def _plan(index, query):
+    return {
+        "index": index,
+        "query": query,
+        "goal": query,
+        "use_pdf_agent": False,
+        "pdf_instructions": "",
+        "use_search_agent": True,
+        "search_queries": [f"{query} latest"],
+        "writer_instructions": "",
+    }
+
+
+class FakeLLM:
+    """Returns a canned reply (or raises) and records how often it was called."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        if isinstance(self.reply, Exception):
+            raise self.reply
+        return SimpleNamespace(content=self.reply, usage_metadata=None)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    monkeypatch.setattr(config, "PLAN_CACHE_ENABLED", False)
+    monkeypatch.setattr(config, "FAST_PLANNER_ENABLED", False)
+    monkeypatch.setattr(config, "PLANNER_BATCH_SIZE", 8)
+
+    def install(reply):
+        llm = FakeLLM(reply)
+        monkeypatch.setattr(orchestrator, "get_llm", lambda: llm)
+        return llm
+
+    return install
+
+
+def _searches(plans):
+    return [plan["search_queries"] if plan else None for plan in plans]
+
+
+def test_parse_plans_reordered():
+    reply = json.dumps([_plan(3, QUERIES[2]), _plan(1, QUERIES[0]), _plan(2, QUERIES[1])])
+    plans = _parse_plans(reply, QUERIES)
+    assert _searches(plans) == [[f"{q} latest"] for q in QUERIES]
+    assert all("index" not in plan and "query" not in plan for plan in plans)
+
+
+def test_parse_plans_missing_item():
+    reply = json.dumps({"plans": [_plan(1, QUERIES[0]), _plan(3, QUERIES[2])]})
+    plans = _parse_plans(reply, QUERIES)
+    assert _searches(plans) == [[f"{QUERIES[0]} latest"], None, [f"{QUERIES[2]} latest"]]
+
+
+def test_parse_plans_wrong_echo():
+    # Index 1 echoes request 2's query: trust the query, not the index
+    moved = _plan(1, QUERIES[1])
+    # Echoes a query nobody asked: dropped, even with a valid index
+    stray = _plan(3, "Qualcomm licensing revenue")
+    plans = _parse_plans(json.dumps([moved, stray]), QUERIES)
+    assert _searches(plans) == [None, [f"{QUERIES[1]} latest"], None]
+
+
+def test_parse_plans_duplicate_slot_keeps_first():
+    reply = json.dumps([_plan(1, QUERIES[0]), dict(_plan(1, QUERIES[0]), search_queries=["other"])])
+    plans = _parse_plans(reply, QUERIES[:1])
+    assert _searches(plans) == [[f"{QUERIES[0]} latest"]]
+
+
+def test_parse_plans_malformed_json():
+    good = json.dumps(_plan(2, QUERIES[1]))
+    reply = "```json\n[" + '{"index": 1, "query": "' + QUERIES[0] + '", "use_pdf_agent": tru,\n' + good + "]\n```"
+    plans = _parse_plans(reply, QUERIES)
+    assert _searches(plans) == [None, [f"{QUERIES[1]} latest"], None]
+    assert _parse_plans("not json at all", QUERIES) == [None, None, None]
+
+
+def test_plan_many_falls_back_per_request(fake_llm):
+    # Reordered, one missing, one echoing the wrong query
+    llm = fake_llm(json.dumps([_plan(3, QUERIES[2]), _plan(1, "Something else entirely")]))
+    plans = plan_many([(q, []) for q in QUERIES])
+    assert llm.calls == 1
+    assert plans[0] == _default_plan(QUERIES[0], [])
+    assert plans[1] == _default_plan(QUERIES[1], [])
+    assert plans[2]["search_queries"] == [f"{QUERIES[2]} latest"]
+
+
+def test_plan_many_malformed_batch(fake_llm):
+    fake_llm("I could not produce plans for these requests.")
+    plans = plan_many([(q, []) for q in QUERIES])
+    assert plans == [_default_plan(q, []) for q in QUERIES]
+
+
+def test_plan_many_failed_call(fake_llm):
+    fake_llm(RuntimeError("rate limited"))
+    plans = plan_many([(q, []) for q in QUERIES])
+    assert plans == [_default_plan(q, []) for q in QUERIES]
+
+
+def test_plan_many_deduplicates_requests(fake_llm):
+    llm = fake_llm(json.dumps([_plan(1, QUERIES[0]), _plan(2, QUERIES[1])]))
+    plans = plan_many([(QUERIES[0], []), (QUERIES[1], []), (QUERIES[0], [])])
+    assert llm.calls == 1
+    assert plans[0] == plans[2] and plans[0] is not plans[2]
+    assert plans[1]["search_queries"] == [f"{QUERIES[1]} latest"]
@@ -0,0 +1,148 @@
+"""
+Report cache reuse rules: a repeat of a (normalised) query is served from the
+cache, a stale search generation re-runs only search — and the writer only if
+the results changed — and different documents mean a full run.
+"""
+
+import asyncio
+
+import pytest
+
+import config
+from agents import graph as graph_module
+from agents import report_cache
+from agents.report_cache import ReportCache
+from agents.state import initial_state
+
+PLAN = {
+    "goal": "test",
+    "use_pdf_agent": True,
+    "pdf_instructions": "",
+    "use_search_agent": True,
+    "search_queries": ["test"],
+    "writer_instructions": "",
+}
+FILES = [{"name": "a.pdf", "doc_id": "a" * 64}]
+
+
+class Pipeline:
+    """Stub nodes that count their calls; search returns `self.results`."""
+
+    def __init__(self):
+        self.calls = dict.fromkeys(
+            ["speculative_search", "planner", "pdf_agent", "search_agent", "writer"], 0
+        )
+        self.results = [{"url": "u", "content": "first"}]
+
+    def _node(self, name, update):
+        def run(state):
+            self.calls[name] += 1
+            return {**update(state), "status": {name: "done"}}
+
+        async def arun(state):
+            return run(state)
+
+        return run, arun
+
+    def nodes(self):
+        return {
+            "speculative_search": self._node("speculative_search", lambda s: {}),
+            "planner": self._node("planner", lambda s: {"plan": dict(PLAN)}),
+            "pdf_agent": self._node("pdf_agent", lambda s: {"pdf_content": "pdf"}),
+            "search_agent": self._node(
+                "search_agent", lambda s: {"search_results": list(self.results)}
+            ),
+            "writer": self._node(
+                "writer", lambda s: {"report": f"report {self.calls['writer']}"}
+            ),
+        }
+
+
+@pytest.fixture
+def pipeline(monkeypatch, tmp_path):
+    stubs = Pipeline()
+    # The refresh graph imports the search and writer nodes itself
+    for name, (fn, afn) in stubs.nodes().items():
+        for module in (graph_module, report_cache):
+            if hasattr(module, f"{name}_node"):
+                monkeypatch.setattr(module, f"{name}_node", fn)
+                monkeypatch.setattr(module, f"a{name}_node", afn)
+
+    graph = graph_module.build_research_graph()
+    refresh = report_cache.build_refresh_graph()
+    cache = ReportCache(cache_dir=str(tmp_path))
+    generation = {"value": "g1"}
+    monkeypatch.setattr(config, "REPORT_CACHE_ENABLED", True)
+    monkeypatch.setattr(report_cache, "get_research_graph", lambda: graph)
+    monkeypatch.setattr(report_cache, "_get_refresh_graph", lambda: refresh)
+    monkeypatch.setattr(report_cache, "get_report_cache", lambda: cache)
+    monkeypatch.setattr(report_cache, "search_generation", lambda: generation["value"])
+    stubs.generation = generation
+    return stubs
+
+
+def _run(query, files=(), use_async=False):
+    state = initial_state(query, list(files))
+    if use_async:
+        async def collect():
+            return [event async for event in report_cache.astream_research(state)]
+
+        events = asyncio.run(collect())
+    else:
+        events = list(report_cache.stream_research(state))
+    updates = {}
+    for mode, chunk in events:
+        if mode == "updates":
+            for node, update in chunk.items():
+                updates.setdefault(node, {}).update(update or {})
+    return updates
+
+
+def _report(updates):
+    return next(u["report"] for u in reversed(list(updates.values())) if u.get("report"))
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_normalized_query_hits_cache(pipeline, use_async):
+    first = _run("NVIDIA data-centre outlook", FILES, use_async)
+    assert _report(first) == "report 1"
+
+    second = _run("  nvidia DATA-CENTRE   outlook?", FILES, use_async)
+    assert list(second) == ["report_cache"]
+    assert second["report_cache"]["report"] == "report 1"
+    assert pipeline.calls["planner"] == pipeline.calls["writer"] == 1
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_refresh_with_unchanged_results_serves_stored_report(pipeline, use_async):
+    _run("NVIDIA outlook", FILES, use_async)
+    pipeline.generation["value"] = "g2"
+
+    updates = _run("NVIDIA outlook", FILES, use_async)
+    assert "search_agent" in updates and "writer" not in updates
+    assert updates["report_cache"]["report"] == "report 1"
+    assert pipeline.calls == {
+        "speculative_search": 1, "planner": 1, "pdf_agent": 1, "search_agent": 2, "writer": 1,
+    }
+
+
+def test_refresh_with_new_results_reruns_writer_only(pipeline):
+    _run("NVIDIA outlook", FILES)
+    pipeline.generation["value"] = "g2"
+    pipeline.results = [{"url": "u", "content": "second"}]
+
+    updates = _run("NVIDIA outlook", FILES)
+    assert _report(updates) == "report 2"
+    assert pipeline.calls["planner"] == pipeline.calls["pdf_agent"] == 1
+    assert pipeline.calls["search_agent"] == pipeline.calls["writer"] == 2
+
+    # The refreshed report is stored against the new generation
+    assert list(_run("NVIDIA outlook", FILES)) == ["report_cache"]
+
+
+def test_different_documents_run_in_full(pipeline):
+    _run("NVIDIA outlook", FILES)
+    updates = _run("NVIDIA outlook", [{"name": "a.pdf", "doc_id": "b" * 64}])
+    assert "report_cache" not in updates
+    assert _report(updates) == "report 2"
+    assert pipeline.calls["planner"] == pipeline.calls["pdf_agent"] == 2
@@ -1,6 +1,24 @@
-"""Utility modules for Market Research GPT."""
+"""Utility modules for Market Research GPT.
 
-from utils.pdf_parser import PDFParser
-from utils.tavily_client import TavilySearch
+Exports are resolved lazily so that importing one utility (e.g.
+`utils.pdf_parser` in a worker process) doesn't pull in the others' heavy
+dependencies.
+"""
 
-__all__ = ["PDFParser", "TavilySearch"]
+import importlib
+
+_EXPORTS = {
+    "BM25Index": "utils.retrieval",
+    "PDFCache": "utils.pdf_cache",
+    "PDFParser": "utils.pdf_parser",
+    "SearchCache": "utils.tavily_client",
+    "TavilySearch": "utils.tavily_client",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
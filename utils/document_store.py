@@ -0,0 +1,104 @@
+"""
+Document Store
+
+Starts PDF extraction in the background as soon as a file is uploaded, so
+most of the parsing overlaps with the user typing a question and with the
+planner LLM call.  The PDF agent then reads the finished (or in-flight)
+result instead of parsing from scratch.
+
+Results also land in the shared PDFCache, so they outlive the store's own
+bounded table of extraction futures.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+import config
+from utils.pdf_parser import PDFParser
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentStore:
+    """Background pre-extraction of uploaded documents, keyed by doc_id."""
+
+    def __init__(self, max_workers: Optional[int] = None, max_entries: Optional[int] = None):
+        self.max_entries = max_entries or config.DOCUMENT_STORE_MAX_ENTRIES
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers or config.PDF_MAX_CONCURRENT_FILES,
+            thread_name_prefix="pdf-prefetch",
+        )
+        self._futures: OrderedDict[str, Future] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def prefetch(self, handle: dict) -> None:
+        """
+        Queue full extraction of an upload-registry handle, once per doc_id.
+
+        Args:
+            handle: Dict with keys doc_id and path (see utils.upload_registry).
+        """
+        doc_id = handle.get("doc_id")
+        path = handle.get("path")
+        if not doc_id or not path:
+            return
+
+        with self._lock:
+            if doc_id in self._futures:
+                self._futures.move_to_end(doc_id)
+                return
+            self._futures[doc_id] = self._pool.submit(
+                self._extract, path, doc_id, handle.get("name", doc_id[:12])
+            )
+            self._evict()
+
+    def get(self, doc_id: str, timeout: Optional[float] = None) -> Optional[dict]:
+        """
+        Return the extraction result for `doc_id`, waiting if it is still
+        running.  Returns None if the document was never prefetched;
+        re-raises the extraction error if it failed.
+        """
+        with self._lock:
+            future = self._futures.get(doc_id)
+        if future is None:
+            return None
+        return future.result(timeout=timeout)
+
+    def is_ready(self, doc_id: str) -> bool:
+        """True once a prefetched document has finished extracting."""
+        with self._lock:
+            future = self._futures.get(doc_id)
+        return future is not None and future.done()
+
+    # ── Internal helpers ──────────────────────────────────────────────────
+
+    @staticmethod
+    def _extract(path: str, doc_id: str, name: str) -> dict:
+        logger.info("Pre-extracting %s in the background", name)
+        return PDFParser().extract(file_path=path, content_hash=doc_id)
+
+    def _evict(self) -> None:
+        # Caller holds self._lock; only finished entries are dropped
+        excess = len(self._futures) - self.max_entries
+        for doc_id in list(self._futures):
+            if excess <= 0:
+                break
+            if self._futures[doc_id].done():
+                del self._futures[doc_id]
+                excess -= 1
+
+
+_default_store: Optional[DocumentStore] = None
+_default_lock = threading.Lock()
+
+
+def get_document_store() -> DocumentStore:
+    """Return the process-wide DocumentStore instance."""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = DocumentStore()
+        return _default_store
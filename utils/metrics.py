@@ -0,0 +1,343 @@
+"""
+Node Metrics and Tracing
+
+`instrument_node` wraps a LangGraph node so every run records, under
+state["metrics"][node_name]:
+
+  - wall_s                 wall-clock seconds
+  - cpu_s                  CPU seconds spent on the node's own behalf: its
+                           thread (for async nodes, only while its coroutine
+                           is running) plus helper threads started through
+                           `bind_context`; not other nodes or sessions, and
+                           not worker processes
+  - process_rss_delta_mb   change in the process's current RSS from the
+                           node's start to its end (negative if memory was
+                           released) — process-wide, so concurrent nodes
+                           and sessions contribute too
+  - llm_calls, llm_prompt_tokens, llm_completion_tokens
+  - tavily_calls, tavily_cache_hits
+  - pages_parsed, pdf_cache_hits
+  - plan_cache_hits, fast_plans, plan_fallbacks (plans that came from the
+                           plan cache, the rule-based router, or the default
+                           plan after an unusable LLM reply)
+  - node-specific details set with `detail(...)`, e.g. the PDF agent's
+    file_seconds
+
+Counters are bumped from anywhere below the node with `count(...)`; the
+active node is tracked in a context variable, so helper thread pools must
+hand work over with `bind_context` for their counts to be attributed.
+
+When config.TRACE_EXPORT_ENABLED is set, each node run is also appended to
+config.TRACE_EXPORT_PATH as an OpenTelemetry-style JSON span (one per line).
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import threading
+import time
+import types
+import uuid
+from typing import Any, Callable, Optional
+
+import config
+
+try:
+    import psutil
+except ImportError:  # Optional; /proc is read instead where available
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+COUNTERS = (
+    "llm_calls",
+    "llm_prompt_tokens",
+    "llm_completion_tokens",
+    "tavily_calls",
+    "tavily_cache_hits",
+    "pages_parsed",
+    "pdf_cache_hits",
+    "plan_cache_hits",
+    "fast_plans",
+    "plan_fallbacks",
+)
+
+_SERVICE_NAME = "market-research-gpt"
+
+
+class NodeMetrics:
+    """Thread-safe counters for one node run."""
+
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.details: dict[str, Any] = {}
+        self.cpu_s = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def add_cpu(self, seconds: float) -> None:
+        with self._lock:
+            self.cpu_s += seconds
+
+    def set_detail(self, name: str, value: Any) -> None:
+        with self._lock:
+            self.details[name] = value
+
+
+_current: contextvars.ContextVar[Optional[NodeMetrics]] = contextvars.ContextVar(
+    "node_metrics", default=None
+)
+
+
+def count(name: str, n: int = 1) -> None:
+    """Add `n` to counter `name` of the node currently running (no-op outside one)."""
+    collector = _current.get()
+    if collector is not None and n:
+        collector.add(name, n)
+
+
+def detail(name: str, value: Any) -> None:
+    """Set `name` in the metrics record of the node currently running (no-op outside one)."""
+    collector = _current.get()
+    if collector is not None:
+        collector.set_detail(name, value)
+
+
+def record_llm_usage(usage: Optional[dict]) -> None:
+    """Count one LLM call and its reported token usage (a message's usage_metadata)."""
+    count("llm_calls")
+    usage = usage or {}
+    count("llm_prompt_tokens", usage.get("input_tokens", 0))
+    count("llm_completion_tokens", usage.get("output_tokens", 0))
+
+
+def bind_context(fn: Callable) -> Callable:
+    """
+    Return `fn` bound to the caller's context, for submitting to a thread
+    pool whose workers would otherwise lose the active node.  The worker's
+    CPU time is added to that node's cpu_s.
+    """
+    ctx = contextvars.copy_context()
+
+    def timed(*args, **kwargs):
+        started = time.thread_time()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            collector = _current.get()
+            if collector is not None:
+                collector.add_cpu(time.thread_time() - started)
+
+    @functools.wraps(fn)
+    def run(*args, **kwargs):
+        # A Context can only be entered by one thread at a time
+        return ctx.copy().run(timed, *args, **kwargs)
+
+    return run
+
+
+@types.coroutine
+def _cpu_timed(coro, collector: NodeMetrics):
+    """
+    Drive `coro`, charging the thread CPU of each of its steps to `collector`;
+    time spent on other tasks while it is suspended is not counted.
+    """
+    value, error = None, None
+    while True:
+        started = time.thread_time()
+        try:
+            if error is not None:
+                yielded = coro.throw(error)
+            else:
+                yielded = coro.send(value)
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            collector.add_cpu(time.thread_time() - started)
+        value, error = None, None
+        try:
+            value = yield yielded
+        except GeneratorExit:
+            coro.close()
+            raise
+        except BaseException as e:
+            error = e
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size of this process, in MiB, from psutil when it is
+    installed and /proc/self/statm otherwise (0 where neither is available).
+    """
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    try:
+        with open("/proc/self/statm", "rb") as fh:
+            resident_pages = int(fh.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return 0.0
+    return resident_pages * _PAGE_SIZE / (1024 * 1024)
+
+
+# ── Node wrapper ──────────────────────────────────────────────────────────────
+
+
+def instrument_node(name: str, fn: Callable[[dict], Any]) -> Callable[[dict], Any]:
+    """
+    Wrap a LangGraph node so each run adds its metrics to state["metrics"].
+    Coroutine functions get an async wrapper.
+    """
+    if inspect.iscoroutinefunction(fn):
+
+        @functools.wraps(fn)
+        async def async_wrapper(state: dict) -> dict:
+            with _NodeRun(name, state, thread_cpu=False) as run:
+                run.update = await _cpu_timed(fn(state), run.collector)
+            return run.result()
+
+        return async_wrapper
+
+    @functools.wraps(fn)
+    def wrapper(state: dict) -> dict:
+        with _NodeRun(name, state) as run:
+            run.update = fn(state)
+        return run.result()
+
+    return wrapper
+
+
+class _NodeRun:
+    """Measures one node run; exports its span on exit (including on error)."""
+
+    def __init__(self, name: str, state: dict, thread_cpu: bool = True):
+        self.name = name
+        self.thread_cpu = thread_cpu  # Async nodes are timed per step instead
+        self.trace_id = _trace_id(state)
+        self.span_id = uuid.uuid4().hex[:16]
+        self.collector = NodeMetrics()
+        self.update: Optional[dict] = None
+        self.record: dict = {}
+
+    def __enter__(self) -> "_NodeRun":
+        self._token = _current.set(self.collector)
+        self._rss_before = rss_mb()
+        self._start_ns = time.time_ns()
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.thread_time()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        _current.reset(self._token)
+        if self.thread_cpu:
+            self.collector.add_cpu(time.thread_time() - self._cpu_start)
+        self.record = {
+            "wall_s": round(time.perf_counter() - self._wall_start, 4),
+            "cpu_s": round(self.collector.cpu_s, 4),
+            "process_rss_delta_mb": round(rss_mb() - self._rss_before, 1),
+            **self.collector.counters,
+            **self.collector.details,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+        }
+        if config.TRACE_EXPORT_ENABLED:
+            get_span_exporter().export(
+                _span(self.name, self.record, self._start_ns, time.time_ns(), exc)
+            )
+
+    def result(self) -> dict:
+        update = dict(self.update or {})
+        update["metrics"] = {self.name: self.record}
+        return update
+
+
+def _trace_id(state: dict) -> str:
+    # Nodes of one run share a trace id, carried along in the metrics
+    for record in (state.get("metrics") or {}).values():
+        if isinstance(record, dict) and record.get("trace_id"):
+            return record["trace_id"]
+    return uuid.uuid4().hex
+
+
+def _span(
+    name: str,
+    record: dict,
+    start_ns: int,
+    end_ns: int,
+    error: Optional[BaseException],
+) -> dict:
+    attributes = {
+        f"research.{key}": value
+        for key, value in record.items()
+        if key not in ("trace_id", "span_id")
+    }
+    attributes["research.node"] = name
+    return {
+        "trace_id": record["trace_id"],
+        "span_id": record["span_id"],
+        "parent_span_id": None,
+        "name": f"research.{name}",
+        "kind": "SPAN_KIND_INTERNAL",
+        "start_time_unix_nano": start_ns,
+        "end_time_unix_nano": end_ns,
+        "attributes": attributes,
+        "status": (
+            {"code": "STATUS_CODE_ERROR", "message": str(error)}
+            if error is not None
+            else {"code": "STATUS_CODE_OK"}
+        ),
+        "resource": {"service.name": _SERVICE_NAME},
+    }
+
+
+def summarize(metrics: dict) -> dict:
+    """Counter and CPU-time totals across all nodes of one run."""
+    totals = dict.fromkeys(COUNTERS, 0)
+    totals["cpu_s"] = 0.0
+    for record in metrics.values():
+        for key in totals:
+            totals[key] += record.get(key, 0)
+    totals["cpu_s"] = round(totals["cpu_s"], 4)
+    return totals
+
+
+# ── Span export ───────────────────────────────────────────────────────────────
+
+
+class SpanExporter:
+    """Appends spans as JSON lines to a local file."""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or config.TRACE_EXPORT_PATH
+        self._lock = threading.Lock()
+
+    def export(self, span: dict) -> None:
+        line = json.dumps(span, default=str)
+        try:
+            with self._lock:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as fh:
+                    fh.write(line + "\n")
+        except OSError as e:
+            logger.warning("Could not export span %s: %s", span.get("name"), e)
+
+
+_default_exporter: Optional[SpanExporter] = None
+_default_lock = threading.Lock()
+
+
+def get_span_exporter() -> SpanExporter:
+    """Return the process-wide SpanExporter instance."""
+    global _default_exporter
+    with _default_lock:
+        if _default_exporter is None:
+            _default_exporter = SpanExporter()
+        return _default_exporter
@@ -0,0 +1,208 @@
+"""
+PDF Extraction Cache
+
+Content-addressed, two-tier cache for PDFParser results.  Entries are keyed
+by the SHA-256 of the PDF bytes plus the extraction settings that affect the
+output, so a follow-up query on the same filing skips parsing entirely.
+
+  - memory tier: in-process LRU bounded by entry count
+  - disk tier:   one JSON file per entry under config.PDF_CACHE_DIR,
+                 evicted oldest-first once the directory exceeds its size cap
+"""
+
+import copy
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def hash_bytes(data: bytes) -> str:
+    """Return the SHA-256 hex digest of `data`."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(file_path: str) -> str:
+    """Return the SHA-256 hex digest of a file, hashed through a memory map."""
+    with open(file_path, "rb") as fh:
+        if os.fstat(fh.fileno()).st_size == 0:
+            return hashlib.sha256(b"").hexdigest()
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return hashlib.sha256(mapped).hexdigest()
+
+
+class PDFCache:
+    """Two-tier (memory LRU + disk) cache of parsed PDF results."""
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        max_memory_entries: Optional[int] = None,
+        max_disk_bytes: Optional[int] = None,
+    ):
+        self.cache_dir = cache_dir or config.PDF_CACHE_DIR
+        self.max_memory_entries = (
+            max_memory_entries
+            if max_memory_entries is not None
+            else config.PDF_CACHE_MEMORY_ENTRIES
+        )
+        self.max_disk_bytes = (
+            max_disk_bytes
+            if max_disk_bytes is not None
+            else config.PDF_CACHE_DISK_MAX_MB * 1024 * 1024
+        )
+        self._memory: OrderedDict[str, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    # ── Public API ────────────────────────────────────────────────────────
+
+    @staticmethod
+    def make_key(
+        content_hash: str,
+        max_pages: int,
+        extract_tables: bool,
+        char_budget: Optional[int] = None,
+    ) -> str:
+        """Combine the document hash with the settings that shape the output."""
+        settings = f"{content_hash}:{max_pages}:{int(bool(extract_tables))}"
+        if char_budget:
+            settings += f":budget={char_budget}"
+        return hashlib.sha256(settings.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return a copy of the cached result for `key`, or None."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(self._memory[key])
+
+        result = self._read_disk(key)
+
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._remember(key, result)
+        return copy.deepcopy(result)
+
+    def put(self, key: str, result: dict) -> None:
+        """Store a parsed result in both tiers."""
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._remember(key, result)
+        self._write_disk(key, result)
+
+    def clear(self) -> None:
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith(".json"):
+                    try:
+                        os.remove(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current memory-tier size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_entries": len(self._memory),
+            }
+
+    # ── Internal helpers ──────────────────────────────────────────────────
+
+    def _remember(self, key: str, result: dict) -> None:
+        # Caller holds self._lock
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[dict]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                result = json.load(fh)
+            os.utime(path)  # Bump recency for eviction
+            return result
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Discarding unreadable PDF cache entry %s: %s", key, e)
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+    def _write_disk(self, key: str, result: dict) -> None:
+        if self.max_disk_bytes <= 0:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as fh:
+                json.dump(result, fh)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning("Could not write PDF cache entry %s: %s", key, e)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Remove least-recently-used files until the tier fits its size cap."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+_default_cache: Optional[PDFCache] = None
+_default_lock = threading.Lock()
+
+
+def get_pdf_cache() -> PDFCache:
+    """Return the process-wide PDFCache instance."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PDFCache()
+        return _default_cache
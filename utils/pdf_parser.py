@@ -7,11 +7,16 @@ Follows the PDF Extraction SKILL.md specification.
 
 import io
 import logging
-from typing import Optional, Union
-
-import pdfplumber
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterator, Optional, Union
 
 import config
+from utils import metrics
+from utils.pdf_cache import PDFCache, get_pdf_cache, hash_bytes, hash_file
 
 logger = logging.getLogger(__name__)
 
@@ -19,84 +24,242 @@ logger = logging.getLogger(__name__)
 class PDFParser:
     """Extract structured content from PDF documents using pdfplumber."""
 
+    def __init__(self, cache: Optional[PDFCache] = None, use_cache: Optional[bool] = None):
+        """
+        Args:
+            cache: Cache for parsed results (default: the shared PDFCache).
+            use_cache: Enable caching (default from config.PDF_CACHE_ENABLED).
+        """
+        if use_cache is None:
+            use_cache = config.PDF_CACHE_ENABLED
+        self.cache: Optional[PDFCache] = (cache or get_pdf_cache()) if use_cache else None
+
     # ── Public API ────────────────────────────────────────────────────────
 
     def extract(
         self,
         pdf_bytes: Optional[bytes] = None,
         file_path: Optional[str] = None,
+        char_budget: Optional[int] = None,
+        content_hash: Optional[str] = None,
     ) -> dict:
         """
         Extract text and tables from a PDF.
 
         Args:
             pdf_bytes: Raw PDF bytes (mutually exclusive with file_path).
-            file_path: Path to a PDF on disk.
+            file_path: Path to a PDF on disk; preferred for large files, as
+                pages are read from disk instead of an in-memory copy.
+            char_budget: Stop parsing once this many characters of text and
+                tables have been collected (default: parse every page).
+            content_hash: SHA-256 of the document, if the caller already
+                knows it (skips re-hashing).
 
         Returns:
-            dict with keys: text, tables, metadata
+            dict with keys: text, tables, metadata (incl. the document's
+            sha256)
+
+        Results are cached by content hash, so re-extracting the same
+        document with the same settings skips parsing.
+        """
+        if pdf_bytes is None and file_path is None:
+            raise ValueError("Provide either pdf_bytes or file_path")
+
+        if content_hash is None:
+            content_hash = (
+                hash_bytes(pdf_bytes) if pdf_bytes is not None else hash_file(file_path)
+            )
+
+        if self.cache is None:
+            result = self._extract_uncached(pdf_bytes, file_path, char_budget)
+            result["metadata"]["sha256"] = content_hash
+            return result
+
+        key = PDFCache.make_key(
+            content_hash,
+            config.PDF_MAX_PAGES,
+            config.PDF_TABLE_EXTRACTION,
+            char_budget,
+        )
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            logger.info("PDF cache hit for %s", content_hash[:12])
+            metrics.count("pdf_cache_hits")
+            cached["metadata"].setdefault("sha256", content_hash)
+            return cached
+
+        result = self._extract_uncached(pdf_bytes, file_path, char_budget)
+        result["metadata"]["sha256"] = content_hash
+        self.cache.put(key, result)
+        return result
+
+    def iter_pages(
+        self,
+        pdf_bytes: Optional[bytes] = None,
+        file_path: Optional[str] = None,
+    ) -> Iterator[dict]:
+        """
+        Lazily extract a PDF one page at a time.
+
+        Args:
+            pdf_bytes: Raw PDF bytes (mutually exclusive with file_path).
+            file_path: Path to a PDF on disk.
+
+        Yields:
+            dict with keys: page (1-based), page_count, text (annotated with
+            its page marker, as in `extract`; "" for blank pages), tables.
+
+        Stop iterating (or call `.close()`) to skip the remaining pages; the
+        document is closed either way.
         """
         if pdf_bytes is not None:
-            return self._extract_from_bytes(pdf_bytes)
+            source = io.BytesIO(pdf_bytes)
         elif file_path is not None:
-            return self._extract_from_path(file_path)
+            source = file_path
         else:
             raise ValueError("Provide either pdf_bytes or file_path")
 
+        extract_tables = config.PDF_TABLE_EXTRACTION
+
+        try:
+            pdf = _open_pdf(source)
+        except Exception as e:
+            logger.error("Error opening PDF: %s", e)
+            raise Exception(f"Error parsing PDF: {str(e)}")
+
+        with pdf:
+            page_count = len(pdf.pages)
+            for i, page in enumerate(pdf.pages[: config.PDF_MAX_PAGES]):
+                text, tables = _extract_page(page, i, extract_tables)
+                page.close()  # Release cached layout objects for this page
+                yield {
+                    "page": i + 1,
+                    "page_count": page_count,
+                    "text": text or "",
+                    "tables": tables,
+                }
+
     # ── Internal helpers ──────────────────────────────────────────────────
 
+    def _extract_uncached(
+        self,
+        pdf_bytes: Optional[bytes],
+        file_path: Optional[str],
+        char_budget: Optional[int] = None,
+    ) -> dict:
+        if char_budget:
+            result = self._extract_with_budget(pdf_bytes, file_path, char_budget)
+        elif pdf_bytes is not None:
+            result = self._extract_from_bytes(pdf_bytes)
+        else:
+            result = self._extract_from_path(file_path)
+        metrics.count("pages_parsed", result["metadata"]["pages_processed"])
+        return result
+
+    def _extract_with_budget(
+        self,
+        pdf_bytes: Optional[bytes],
+        file_path: Optional[str],
+        char_budget: int,
+    ) -> dict:
+        """Consume `iter_pages` until `char_budget` characters are collected."""
+        text_parts: list[str] = []
+        tables: list[str] = []
+        collected = 0
+        page_count = 0
+        pages_processed = 0
+
+        pages = self.iter_pages(pdf_bytes=pdf_bytes, file_path=file_path)
+        try:
+            for page in pages:
+                page_count = page["page_count"]
+                pages_processed = page["page"]
+                if page["text"]:
+                    text_parts.append(page["text"])
+                    collected += len(page["text"])
+                tables.extend(page["tables"])
+                collected += sum(len(t) for t in page["tables"])
+                if collected >= char_budget:
+                    break
+        finally:
+            pages.close()
+
+        if not text_parts:
+            raise ValueError("No text could be extracted from the PDF")
+
+        truncated = pages_processed < min(page_count, config.PDF_MAX_PAGES)
+        if truncated:
+            logger.info(
+                "Stopped after %d/%d pages (char budget %d reached)",
+                pages_processed,
+                page_count,
+                char_budget,
+            )
+
+        return {
+            "text": "\n\n".join(text_parts),
+            "tables": tables,
+            "metadata": {
+                "page_count": page_count,
+                "pages_processed": pages_processed,
+                "truncated": truncated,
+            },
+        }
+
     def _extract_from_bytes(self, pdf_bytes: bytes) -> dict:
         try:
             pdf_file = io.BytesIO(pdf_bytes)
-            with pdfplumber.open(pdf_file) as pdf:
-                return self._process_pdf(pdf)
+            with _open_pdf(pdf_file) as pdf:
+                return self._process_pdf(pdf, source=pdf_bytes)
         except Exception as e:
             logger.error("Error parsing PDF from bytes: %s", e)
             raise Exception(f"Error parsing PDF: {str(e)}")
 
     def _extract_from_path(self, file_path: str) -> dict:
         try:
-            with pdfplumber.open(file_path) as pdf:
-                return self._process_pdf(pdf)
+            with _open_pdf(file_path) as pdf:
+                return self._process_pdf(pdf, source=file_path)
         except Exception as e:
             logger.error("Error parsing PDF from file %s: %s", file_path, e)
             raise Exception(f"Error parsing PDF: {str(e)}")
 
-    def _process_pdf(self, pdf) -> dict:
+    def _process_pdf(self, pdf, source: Union[bytes, str, None] = None) -> dict:
         max_pages = config.PDF_MAX_PAGES
         extract_tables = config.PDF_TABLE_EXTRACTION
 
-        text_parts: list[str] = []
-        tables: list[str] = []
         page_count = len(pdf.pages)
+        pages_to_process = min(page_count, max_pages)
+        workers = min(config.PDF_EXTRACTION_WORKERS, pages_to_process)
 
-        for i, page in enumerate(pdf.pages[:max_pages]):
-            # ── Text extraction ───────────────────────────────────────
-            page_text = page.extract_text()
-            if page_text and page_text.strip():
-                text_parts.append(f"--- Page {i + 1} ---\n{page_text.strip()}")
-
-            # ── Table extraction ──────────────────────────────────────
-            if extract_tables:
-                try:
-                    page_tables = page.extract_tables()
-                    for t_idx, table in enumerate(page_tables):
-                        md_table = self._table_to_markdown(table)
-                        if md_table:
-                            tables.append(
-                                f"**Table (Page {i + 1}, #{t_idx + 1})**\n{md_table}"
-                            )
-                except Exception as e:
-                    logger.warning(
-                        "Could not extract table on page %d: %s", i + 1, e
-                    )
+        pages = None
+        if (
+            source is not None
+            and workers > 1
+            and pages_to_process >= config.PDF_PARALLEL_MIN_PAGES
+        ):
+            pages = self._extract_pages_parallel(
+                source, pages_to_process, workers, extract_tables
+            )
+        if pages is None:
+            pages = [
+                _extract_page(page, i, extract_tables)
+                for i, page in enumerate(pdf.pages[:max_pages])
+            ]
+
+        text_parts: list[str] = []
+        tables: list[str] = []
+        for page_text, page_tables in pages:
+            if page_text:
+                text_parts.append(page_text)
+            tables.extend(page_tables)
 
         if not text_parts:
             raise ValueError("No text could be extracted from the PDF")
 
         metadata = {
             "page_count": page_count,
-            "pages_processed": min(page_count, max_pages),
+            "pages_processed": pages_to_process,
         }
 
         return {
@@ -105,6 +268,59 @@ class PDFParser:
             "metadata": metadata,
         }
 
+    @staticmethod
+    def _extract_pages_parallel(
+        source: Union[bytes, str],
+        page_total: int,
+        workers: int,
+        extract_tables: bool,
+    ) -> Optional[list[tuple[Optional[str], list[str]]]]:
+        """
+        Split pages into contiguous ranges and extract them on the shared
+        process pool (see `_get_process_pool`).
+
+        Each worker re-opens the document itself.  Returns per-page results in
+        page order, or None if the pool could not be used, a range failed or
+        was cancelled, or the document did not finish within
+        config.PDF_EXTRACTION_TIMEOUT overall (caller falls back to serial
+        extraction).  Only a broken pool is replaced; other failures affect
+        this document alone.
+        """
+        chunk = -(-page_total // workers)  # ceil division
+        ranges = [
+            (start, min(start + chunk, page_total))
+            for start in range(0, page_total, chunk)
+        ]
+
+        pool = _get_process_pool()
+        futures = []
+        deadline = time.monotonic() + config.PDF_EXTRACTION_TIMEOUT
+        try:
+            futures = [
+                pool.submit(_extract_page_range, source, start, stop, extract_tables)
+                for start, stop in ranges
+            ]
+            pages: list[tuple[Optional[str], list[str]]] = []
+            for future in futures:
+                pages.extend(future.result(timeout=max(0.0, deadline - time.monotonic())))
+        except BrokenProcessPool as e:
+            # The pool itself is unusable; replace it for everyone
+            _discard_process_pool(pool)
+            logger.warning("PDF extraction pool broke, using serial: %s", e)
+            return None
+        except Exception as e:
+            # Timeout, a worker error or a cancelled range: only this document
+            # falls back, the shared pool stays up
+            for future in futures:
+                future.cancel()
+            logger.warning("Parallel PDF extraction failed, using serial: %r", e)
+            return None
+
+        logger.info(
+            "Extracted %d pages across %d worker processes", page_total, len(ranges)
+        )
+        return pages
+
     @staticmethod
     def _table_to_markdown(table: list[list]) -> Optional[str]:
         """Convert a pdfplumber table (list-of-lists) to a Markdown table."""
@@ -128,3 +344,84 @@ class PDFParser:
             md_lines.append("| " + " | ".join(padded[: len(header)]) + " |")
 
         return "\n".join(md_lines)
+
+
+# ── Shared extraction pool ────────────────────────────────────────────────────
+# One pool for the whole process, so concurrent documents, jobs and prefetches
+# share config.PDF_EXTRACTION_WORKERS processes instead of each starting their
+# own.  Workers are spawned rather than forked: callers are multi-threaded,
+# and a forked child could inherit a lock (e.g. logging's) held by another
+# thread and deadlock.
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Return the process-wide extraction pool, starting it on first use."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=max(1, config.PDF_EXTRACTION_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _process_pool
+
+
+def _discard_process_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next extraction starts a fresh one."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is not pool:
+            return  # Already replaced by another caller
+        _process_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ── Page-level workers (module level so they can run in a process pool) ──────
+
+
+def _open_pdf(source):
+    """Open a PDF with pdfplumber, importing it on first use."""
+    import pdfplumber
+
+    return pdfplumber.open(source)
+
+
+def _extract_page(
+    page, index: int, extract_tables: bool
+) -> tuple[Optional[str], list[str]]:
+    """Extract the annotated text and Markdown tables from a single page."""
+    # ── Text extraction ───────────────────────────────────────────────
+    page_text = page.extract_text()
+    text = None
+    if page_text and page_text.strip():
+        text = f"--- Page {index + 1} ---\n{page_text.strip()}"
+
+    # ── Table extraction ──────────────────────────────────────────────
+    tables: list[str] = []
+    if extract_tables:
+        try:
+            for t_idx, table in enumerate(page.extract_tables()):
+                md_table = PDFParser._table_to_markdown(table)
+                if md_table:
+                    tables.append(
+                        f"**Table (Page {index + 1}, #{t_idx + 1})**\n{md_table}"
+                    )
+        except Exception as e:
+            logger.warning("Could not extract table on page %d: %s", index + 1, e)
+
+    return text, tables
+
+
+def _extract_page_range(
+    source: Union[bytes, str], start: int, stop: int, extract_tables: bool
+) -> list[tuple[Optional[str], list[str]]]:
+    """Process-pool worker: open the document and extract pages [start, stop)."""
+    pdf_file = io.BytesIO(source) if isinstance(source, bytes) else source
+    with _open_pdf(pdf_file) as pdf:
+        return [
+            _extract_page(pdf.pages[i], i, extract_tables)
+            for i in range(start, stop)
+        ]
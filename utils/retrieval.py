@@ -0,0 +1,205 @@
+"""
+PDF Chunk Retrieval
+
+Splits extracted PDF content into page-anchored chunks and ranks them against
+a query with a local BM25 index, so the writer sees the passages of a long
+filing that matter instead of only its first few pages.
+
+The index stores term postings as flat NumPy arrays and scores a query with a
+single vectorised pass, so a 500-page filing is searched in milliseconds with
+no external service.  Indices are cached per document hash and reused across
+follow-up queries.
+"""
+
+import logging
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_PAGE_MARKER_RE = re.compile(r"^--- Page (\d+) ---$", re.MULTILINE)
+_TABLE_PAGE_RE = re.compile(r"\(Page (\d+),")
+
+# Very common words carry no signal for ranking financial passages
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the "
+    "this to was were will with what which who how".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word/number tokens with stopwords removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+# ── Chunking ──────────────────────────────────────────────────────────────────
+
+
+def chunk_document(
+    text: str,
+    tables: list[str],
+    chunk_chars: Optional[int] = None,
+    overlap_chars: Optional[int] = None,
+) -> list[dict]:
+    """
+    Split a PDFParser result into retrievable chunks.
+
+    Text is split per page (on the "--- Page N ---" markers) and then into
+    windows of roughly `chunk_chars` characters on line boundaries, carrying
+    `overlap_chars` of trailing context into the next window.  Each table is
+    its own chunk.
+
+    Returns:
+        List of dicts with keys: kind ("text" | "table"), page, text.
+    """
+    chunk_chars = chunk_chars or config.PDF_CHUNK_CHARS
+    overlap_chars = config.PDF_CHUNK_OVERLAP if overlap_chars is None else overlap_chars
+
+    chunks: list[dict] = []
+
+    markers = list(_PAGE_MARKER_RE.finditer(text))
+    if not markers:
+        pages = [(1, text)]
+    else:
+        pages = []
+        for idx, match in enumerate(markers):
+            end = markers[idx + 1].start() if idx + 1 < len(markers) else len(text)
+            pages.append((int(match.group(1)), text[match.end():end].strip()))
+
+    for page, body in pages:
+        for window in _split_lines(body, chunk_chars, overlap_chars):
+            chunks.append(
+                {"kind": "text", "page": page, "text": f"--- Page {page} ---\n{window}"}
+            )
+
+    for table in tables:
+        match = _TABLE_PAGE_RE.search(table)
+        chunks.append(
+            {"kind": "table", "page": int(match.group(1)) if match else 0, "text": table}
+        )
+
+    return chunks
+
+
+def _split_lines(body: str, chunk_chars: int, overlap_chars: int) -> list[str]:
+    """Greedy line-packing into windows of at most ~chunk_chars characters."""
+    if len(body) <= chunk_chars:
+        return [body] if body else []
+
+    windows: list[str] = []
+    current: list[str] = []
+    size = 0
+    for line in body.splitlines():
+        if current and size + len(line) + 1 > chunk_chars:
+            windows.append("\n".join(current))
+            # Carry trailing lines forward as overlap
+            carry: list[str] = []
+            carried = 0
+            for prev in reversed(current):
+                if carried + len(prev) + 1 > overlap_chars:
+                    break
+                carry.insert(0, prev)
+                carried += len(prev) + 1
+            current, size = carry, carried
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        windows.append("\n".join(current))
+    return windows
+
+
+# ── BM25 index ────────────────────────────────────────────────────────────────
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed list of chunks, stored as flat posting arrays."""
+
+    def __init__(self, chunks: list[dict], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+
+        vocab: dict[str, int] = {}
+        post_terms: list[int] = []
+        post_docs: list[int] = []
+        post_tf: list[int] = []
+        lengths = np.zeros(len(chunks), dtype=np.float64)
+
+        for doc_id, chunk in enumerate(chunks):
+            tokens = tokenize(chunk["text"])
+            lengths[doc_id] = len(tokens)
+            counts: dict[int, int] = {}
+            for tok in tokens:
+                term_id = vocab.setdefault(tok, len(vocab))
+                counts[term_id] = counts.get(term_id, 0) + 1
+            post_terms.extend(counts.keys())
+            post_docs.extend([doc_id] * len(counts))
+            post_tf.extend(counts.values())
+
+        self.vocab = vocab
+        self._terms = np.asarray(post_terms, dtype=np.int64)
+        self._docs = np.asarray(post_docs, dtype=np.int64)
+        self._tf = np.asarray(post_tf, dtype=np.float64)
+
+        n_docs = max(len(chunks), 1)
+        df = np.bincount(self._terms, minlength=len(vocab)).astype(np.float64)
+        self._idf = np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+        avgdl = lengths.mean() if len(chunks) and lengths.mean() > 0 else 1.0
+        # Per-posting length normalisation, precomputed once
+        self._norm = k1 * (1.0 - b + b * lengths[self._docs] / avgdl)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return the BM25 score of every chunk for `query`."""
+        term_ids = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not term_ids or not len(self.chunks):
+            return np.zeros(len(self.chunks), dtype=np.float64)
+
+        mask = np.isin(self._terms, np.asarray(term_ids, dtype=np.int64))
+        tf = self._tf[mask]
+        weights = self._idf[self._terms[mask]] * tf * (self.k1 + 1.0) / (tf + self._norm[mask])
+        return np.bincount(self._docs[mask], weights=weights, minlength=len(self.chunks))
+
+    def top_k(self, query: str, k: int) -> list[tuple[int, float]]:
+        """Return up to `k` (chunk index, score) pairs with a positive score."""
+        scores = self.scores(query)
+        if not len(scores):
+            return []
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(i), float(scores[i])) for i in top if scores[i] > 0]
+
+
+# ── Per-document index cache ──────────────────────────────────────────────────
+
+_index_cache: OrderedDict[str, BM25Index] = OrderedDict()
+_index_lock = threading.Lock()
+
+
+def get_document_index(doc_key: str, build: Callable[[], list[dict]]) -> BM25Index:
+    """
+    Return the cached index for `doc_key`, building it from `build()` chunks
+    on first use.  Bounded by config.PDF_INDEX_CACHE_ENTRIES (LRU).
+    """
+    with _index_lock:
+        index = _index_cache.get(doc_key)
+        if index is not None:
+            _index_cache.move_to_end(doc_key)
+            return index
+
+    index = BM25Index(build())
+
+    with _index_lock:
+        _index_cache[doc_key] = index
+        _index_cache.move_to_end(doc_key)
+        while len(_index_cache) > config.PDF_INDEX_CACHE_ENTRIES:
+            _index_cache.popitem(last=False)
+    return index
@@ -1,38 +1,260 @@
 """
 Tavily Web Search Client
 
-Thin wrapper around the Tavily Python SDK.
+Thin wrapper around the Tavily Python SDK, with a persistent SQLite response
+cache so identical searches issued minutes apart don't hit the network.
 Follows the Web Search SKILL.md specification.
+
+`asearch` / `asearch_many` / `aprefetch` are asyncio counterparts built on
+AsyncTavilyClient; sync and async callers share the cache and the in-flight
+request table.
 """
 
+import asyncio
+import copy
+import json
 import logging
+import os
+import sqlite3
+import threading
 import time
-from typing import Optional
-
-from tavily import TavilyClient
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Optional
 
 import config
+from utils import metrics
+
+if TYPE_CHECKING:
+    from tavily import AsyncTavilyClient, TavilyClient
 
 logger = logging.getLogger(__name__)
 
 
+class SearchCache:
+    """
+    Persistent Tavily response cache backed by a local SQLite file.
+
+    Entries younger than `ttl` seconds are fresh.  Entries older than that but
+    younger than `stale_ttl` are served immediately while the caller refreshes
+    them in the background; anything older is a miss.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+    ):
+        self.path = path or config.TAVILY_CACHE_PATH
+        self.ttl = config.TAVILY_CACHE_TTL if ttl is None else ttl
+        self.stale_ttl = config.TAVILY_CACHE_STALE_TTL if stale_ttl is None else stale_ttl
+        self._lock = threading.Lock()
+        self._refreshing: set[str] = set()
+        self._refresh_pool = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="tavily-refresh"
+        )
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._clears = 0
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " results TEXT NOT NULL,"
+                " fetched_at REAL NOT NULL)"
+            )
+
+    # ── Public API ────────────────────────────────────────────────────────
+
+    @staticmethod
+    def make_key(query: str, max_results: int, search_depth: str) -> str:
+        """Normalise (query, max_results, search_depth) into a cache key."""
+        normalized = " ".join(query.lower().split())
+        return f"{normalized}|{max_results}|{search_depth}"
+
+    def get(self, key: str) -> tuple[Optional[list[dict]], bool]:
+        """
+        Look up `key`.
+
+        Returns:
+            (results, is_stale) — results is None on a miss.
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT results, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+        age = time.time() - row[1] if row else None
+        with self._lock:
+            if row is None or age > self.stale_ttl:
+                self.misses += 1
+                return None, False
+            if age > self.ttl:
+                self.stale_hits += 1
+                return json.loads(row[0]), True
+            self.hits += 1
+            return json.loads(row[0]), False
+
+    def put(self, key: str, results: list[dict]) -> None:
+        """Store `results` for `key`, stamped with the current time."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, results, fetched_at) VALUES (?, ?, ?)",
+                (key, json.dumps(results), time.time()),
+            )
+
+    def refresh_in_background(self, key: str, fetch) -> None:
+        """Run `fetch()` on a background thread and store its result, once per key."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _refresh():
+            try:
+                results = fetch()
+                if results is not None:
+                    self.put(key, results)
+            except Exception as e:
+                logger.warning("Background refresh failed for '%s': %s", key, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_pool.submit(_refresh)
+
+    def stats(self) -> dict:
+        """Return hit / stale-hit / miss counters."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+            }
+
+    def clear(self) -> None:
+        """Delete every cached response."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+        with self._lock:
+            self._clears += 1
+
+    def generation(self) -> str:
+        """
+        Identifier that changes whenever cached responses may have gone stale:
+        once per TTL window and on every clear().  Downstream caches built on
+        search results (e.g. stored reports) key on it.
+        """
+        with self._lock:
+            return f"{int(time.time() // max(self.ttl, 1))}.{self._clears}"
+
+    # ── Internal helpers ──────────────────────────────────────────────────
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per operation keeps this thread-safe
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+
+_default_cache: Optional[SearchCache] = None
+_default_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide SearchCache instance."""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = SearchCache()
+        return _default_cache
+
+
+# ── In-flight request deduplication ──────────────────────────────────────────
+# Searches with the same cache key share one Tavily call while it is running.
+# Once it finishes, later searches go through the response cache like any
+# other (so a finished prefetch is reused only when caching is enabled, and
+# obeys its TTL and clear()); failed fetches are never reused.
+
+_inflight: dict[str, Future] = {}
+_inflight_lock = threading.Lock()
+# Room for every concurrent job to have TAVILY_MAX_CONCURRENCY prefetches out,
+# so a search joining its own prefetch never queues behind other sessions'
+_prefetch_pool = ThreadPoolExecutor(
+    max_workers=max(1, config.TAVILY_MAX_CONCURRENCY * config.JOB_MAX_WORKERS),
+    thread_name_prefix="tavily-prefetch",
+)
+
+# Async prefetch tasks, referenced until done so they aren't garbage-collected
+_prefetch_tasks: set[asyncio.Task] = set()
+
+# AsyncTavilyClient pools are bound to the loop they were created on
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncTavilyClient]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _claim_inflight(key: str) -> tuple[Future, bool]:
+    """Return (future, owner): owner is True if the caller must run the fetch."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return future, False
+        future = Future()
+        _inflight[key] = future
+        return future, True
+
+
+def _release_inflight(key: str) -> None:
+    with _inflight_lock:
+        _inflight.pop(key, None)
+
+
 class TavilySearch:
     """Search the web using the Tavily API."""
 
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache: Optional[SearchCache] = None,
+        use_cache: Optional[bool] = None,
+    ):
         self.api_key = api_key or config.TAVILY_API_KEY
         if not self.api_key:
             logger.warning("TAVILY_API_KEY is not set — web search will be unavailable")
-        self._client: Optional[TavilyClient] = None
+        self._client: Optional["TavilyClient"] = None
+        if use_cache is None:
+            use_cache = config.TAVILY_CACHE_ENABLED
+        self.cache: Optional[SearchCache] = (cache or get_search_cache()) if use_cache else None
 
     @property
-    def client(self) -> TavilyClient:
+    def client(self) -> "TavilyClient":
         if self._client is None:
             if not self.api_key:
                 raise ValueError("TAVILY_API_KEY is not configured")
+            from tavily import TavilyClient
+
             self._client = TavilyClient(api_key=self.api_key)
         return self._client
 
+    @property
+    def aclient(self) -> "AsyncTavilyClient":
+        """Async SDK client for the running event loop (shared per loop)."""
+        if not self.api_key:
+            raise ValueError("TAVILY_API_KEY is not configured")
+        loop = asyncio.get_running_loop()
+        with _inflight_lock:
+            client = _async_clients.get(loop)
+            if client is None:
+                from tavily import AsyncTavilyClient
+
+                client = _async_clients[loop] = AsyncTavilyClient(api_key=self.api_key)
+        return client
+
     def search(
         self,
         query: str,
@@ -49,10 +271,98 @@ class TavilySearch:
 
         Returns:
             List of dicts with keys: title, url, content, score.
+
+        Responses are served from the SQLite cache when fresh; stale entries
+        are returned immediately and refreshed in the background.  Identical
+        searches already in flight (e.g. a speculative prefetch) are joined
+        rather than repeated.
+        """
+        max_results = max_results or config.TAVILY_MAX_RESULTS
+        search_depth = search_depth or config.TAVILY_SEARCH_DEPTH
+        key = SearchCache.make_key(query, max_results, search_depth)
+
+        cached = self._cached(key, query, max_results, search_depth)
+        if cached is not None:
+            return cached
+
+        future, owner = _claim_inflight(key)
+        if owner:
+            metrics.count("tavily_calls")
+            self._run_claimed(key, future, query, max_results, search_depth)
+        return copy.deepcopy(future.result())
+
+    def prefetch(
+        self,
+        query: str,
+        max_results: Optional[int] = None,
+        search_depth: Optional[str] = None,
+    ) -> Future:
+        """
+        Start a search in the background and return its Future.
+
+        A later `search` for the same normalised query joins the in-flight
+        request (or hits the cache) instead of calling Tavily again.
         """
         max_results = max_results or config.TAVILY_MAX_RESULTS
         search_depth = search_depth or config.TAVILY_SEARCH_DEPTH
+        key = SearchCache.make_key(query, max_results, search_depth)
+
+        cached = self._cached(key, query, max_results, search_depth)
+        if cached is not None:
+            done: Future = Future()
+            done.set_result(cached)
+            return done
+
+        future, owner = _claim_inflight(key)
+        if owner:
+            metrics.count("tavily_calls")
+            _prefetch_pool.submit(
+                self._run_claimed, key, future, query, max_results, search_depth
+            )
+        return future
+
+    def cache_stats(self) -> dict:
+        """Hit / stale-hit / miss counters of the response cache (empty if disabled)."""
+        return self.cache.stats() if self.cache is not None else {}
 
+    def _cached(
+        self, key: str, query: str, max_results: int, search_depth: str
+    ) -> Optional[list[dict]]:
+        """Serve from the cache, refreshing stale entries in the background."""
+        if self.cache is None:
+            return None
+        cached, is_stale = self.cache.get(key)
+        if cached is not None:
+            metrics.count("tavily_cache_hits")
+        if cached is not None and is_stale:
+            self.cache.refresh_in_background(
+                key, lambda: self._fetch(query, max_results, search_depth)
+            )
+        return cached
+
+    def _run_claimed(
+        self,
+        key: str,
+        future: Future,
+        query: str,
+        max_results: int,
+        search_depth: str,
+    ) -> None:
+        """Fetch for an in-flight slot this caller owns and publish the result."""
+        try:
+            results = self._fetch(query, max_results, search_depth)
+            if results is not None and self.cache is not None:
+                self.cache.put(key, results)
+            future.set_result(results or [])
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            _release_inflight(key)
+
+    def _fetch(
+        self, query: str, max_results: int, search_depth: str
+    ) -> Optional[list[dict]]:
+        """Call the Tavily API with retries; None if every attempt failed."""
         for attempt in range(3):
             try:
                 response = self.client.search(
@@ -60,20 +370,178 @@ class TavilySearch:
                     max_results=max_results,
                     search_depth=search_depth,
                 )
-                results = response.get("results", [])
-                return [
-                    {
-                        "title": r.get("title", ""),
-                        "url": r.get("url", ""),
-                        "content": r.get("content", ""),
-                        "score": r.get("score", 0.0),
-                    }
-                    for r in results
-                ]
+                return self._normalize(response)
             except Exception as e:
                 logger.warning("Tavily search attempt %d failed: %s", attempt + 1, e)
                 if attempt < 2:
                     time.sleep(2 ** attempt)
                 else:
                     logger.error("All Tavily search attempts failed")
+                    return None
+
+    @staticmethod
+    def _normalize(response: dict) -> list[dict]:
+        return [
+            {
+                "title": r.get("title", ""),
+                "url": r.get("url", ""),
+                "content": r.get("content", ""),
+                "score": r.get("score", 0.0),
+            }
+            for r in response.get("results", [])
+        ]
+
+    def search_many(
+        self,
+        queries: list[str],
+        max_results: Optional[int] = None,
+        search_depth: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> list[list[dict]]:
+        """
+        Run several searches concurrently on a thread pool.
+
+        Args:
+            queries: Search queries to run.
+            max_results: Number of results per query (default from config).
+            search_depth: "basic" or "advanced" (default from config).
+            max_concurrency: Max in-flight requests (default from config).
+
+        Returns:
+            One result list per query, in the same order as `queries`.
+            A query that raises yields an empty list.
+        """
+        if not queries:
+            return []
+
+        max_concurrency = max_concurrency or config.TAVILY_MAX_CONCURRENCY
+        workers = max(1, min(max_concurrency, len(queries)))
+
+        def _run(query: str) -> list[dict]:
+            try:
+                return self.search(query, max_results, search_depth)
+            except Exception as e:
+                logger.error("Search failed for '%s': %s", query, e)
+                return []
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(metrics.bind_context(_run), queries))
+
+    # ── Async API ─────────────────────────────────────────────────────────
+
+    async def asearch(
+        self,
+        query: str,
+        max_results: Optional[int] = None,
+        search_depth: Optional[str] = None,
+    ) -> list[dict]:
+        """Async `search`: same caching, dedup and return value, no thread held."""
+        max_results = max_results or config.TAVILY_MAX_RESULTS
+        search_depth = search_depth or config.TAVILY_SEARCH_DEPTH
+        key = SearchCache.make_key(query, max_results, search_depth)
+
+        cached = self._cached(key, query, max_results, search_depth)
+        if cached is not None:
+            return cached
+
+        future, owner = _claim_inflight(key)
+        if owner:
+            metrics.count("tavily_calls")
+            await self._arun_claimed(key, future, query, max_results, search_depth)
+        return copy.deepcopy(await asyncio.wrap_future(future))
+
+    async def aprefetch(
+        self,
+        query: str,
+        max_results: Optional[int] = None,
+        search_depth: Optional[str] = None,
+    ) -> Future:
+        """
+        Async `prefetch`: start the search as a task on the running loop and
+        return its Future without waiting for it.
+        """
+        max_results = max_results or config.TAVILY_MAX_RESULTS
+        search_depth = search_depth or config.TAVILY_SEARCH_DEPTH
+        key = SearchCache.make_key(query, max_results, search_depth)
+
+        cached = self._cached(key, query, max_results, search_depth)
+        if cached is not None:
+            done: Future = Future()
+            done.set_result(cached)
+            return done
+
+        future, owner = _claim_inflight(key)
+        if owner:
+            metrics.count("tavily_calls")
+            task = asyncio.get_running_loop().create_task(
+                self._arun_claimed(key, future, query, max_results, search_depth)
+            )
+            _prefetch_tasks.add(task)
+            task.add_done_callback(_prefetch_tasks.discard)
+        return future
+
+    async def asearch_many(
+        self,
+        queries: list[str],
+        max_results: Optional[int] = None,
+        search_depth: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> list[list[dict]]:
+        """Async `search_many`: bounded by a semaphore instead of a thread pool."""
+        if not queries:
+            return []
+
+        semaphore = asyncio.Semaphore(max_concurrency or config.TAVILY_MAX_CONCURRENCY)
+
+        async def _run(query: str) -> list[dict]:
+            async with semaphore:
+                try:
+                    return await self.asearch(query, max_results, search_depth)
+                except Exception as e:
+                    logger.error("Search failed for '%s': %s", query, e)
                     return []
+
+        return list(await asyncio.gather(*(_run(q) for q in queries)))
+
+    async def _arun_claimed(
+        self,
+        key: str,
+        future: Future,
+        query: str,
+        max_results: int,
+        search_depth: str,
+    ) -> None:
+        """Async `_run_claimed`."""
+        try:
+            results = await self._afetch(query, max_results, search_depth)
+            if results is not None and self.cache is not None:
+                self.cache.put(key, results)
+            future.set_result(results or [])
+        except asyncio.CancelledError:
+            # e.g. the loop shut down mid-prefetch; don't leave joiners waiting
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            _release_inflight(key)
+
+    async def _afetch(
+        self, query: str, max_results: int, search_depth: str
+    ) -> Optional[list[dict]]:
+        """Async `_fetch`: retries back off with asyncio.sleep."""
+        for attempt in range(3):
+            try:
+                response = await self.aclient.search(
+                    query=query,
+                    max_results=max_results,
+                    search_depth=search_depth,
+                )
+                return self._normalize(response)
+            except Exception as e:
+                logger.warning("Tavily search attempt %d failed: %s", attempt + 1, e)
+                if attempt < 2:
+                    await asyncio.sleep(2 ** attempt)
+                else:
+                    logger.error("All Tavily search attempts failed")
+                    return None
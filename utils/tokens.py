@@ -0,0 +1,76 @@
+"""
+Token Counting
+
+Counts and truncates text in model tokens with tiktoken when it is installed
+and its encoding can be loaded, and with a ~4 characters-per-token estimate
+otherwise (tiktoken is optional; its BPE files are fetched on first use, so
+offline hosts may not have them).  The encoding is loaded once per process.
+"""
+
+import logging
+import math
+import threading
+
+import config
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4  # Estimate used when tiktoken is unavailable
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Return the tiktoken encoding for config.LLM_MODEL, or None."""
+    global _encoding, _encoding_loaded
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            try:
+                import tiktoken
+
+                try:
+                    _encoding = tiktoken.encoding_for_model(config.LLM_MODEL)
+                except KeyError:
+                    _encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                logger.info("tiktoken unavailable (%s); estimating token counts", e)
+                _encoding = None
+        return _encoding
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in `text`."""
+    if not text:
+        return 0
+    encoding = _get_encoding()
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut `text` to at most `max_tokens` tokens, backing off to the last line
+    or sentence break when one falls in the final third of what is kept.
+    """
+    if max_tokens <= 0:
+        return ""
+    encoding = _get_encoding()
+    if encoding is None:
+        limit = max_tokens * CHARS_PER_TOKEN
+        if len(text) <= limit:
+            return text
+        cut = text[:limit]
+    else:
+        ids = encoding.encode(text, disallowed_special=())
+        if len(ids) <= max_tokens:
+            return text
+        cut = encoding.decode(ids[:max_tokens])
+
+    boundary = max(cut.rfind("\n"), cut.rfind(". "))
+    if boundary >= len(cut) * 2 // 3:
+        cut = cut[: boundary + 1]
+    return cut.rstrip()
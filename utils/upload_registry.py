@@ -0,0 +1,249 @@
+"""
+Upload Registry
+
+Writes each uploaded document to a working directory exactly once, keyed by
+content hash, so the Streamlit script doesn't copy every PDF into session
+state on each rerun.  Graph state carries lightweight handles
+({name, doc_id, path, size}) instead of raw bytes, and the PDF agent opens
+the file by path — no in-memory copy of the upload is ever made.
+
+The working directory is bounded by total size and evicts least-recently-used
+documents first.  Documents left by earlier runs are picked up at startup
+(oldest modification time first) so they count towards the bound too.
+"""
+
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Union
+
+import config
+
+logger = logging.getLogger(__name__)
+
+_COPY_CHUNK = 1024 * 1024
+_DOC_NAME_RE = re.compile(r"^([0-9a-f]{64})\.pdf$")
+_STALE_TMP_SECONDS = 3600  # Partial writes older than this are left over from a crash
+
+
+class UploadRegistry:
+    """Process-wide store of uploaded documents, deduplicated by SHA-256."""
+
+    def __init__(
+        self,
+        upload_dir: Optional[str] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.upload_dir = upload_dir or config.UPLOAD_DIR
+        self.max_bytes = (
+            max_bytes if max_bytes is not None else config.UPLOAD_REGISTRY_MAX_MB * 1024 * 1024
+        )
+        self._docs: OrderedDict[str, int] = OrderedDict()  # doc_id → size
+        self._file_ids: dict[str, str] = {}  # uploader file_id → doc_id
+        self._total = 0
+        self._lock = threading.Lock()
+        self._load_existing()
+
+    # ── Public API ────────────────────────────────────────────────────────
+
+    def register(
+        self,
+        name: str,
+        data: Union[bytes, memoryview],
+        file_id: Optional[str] = None,
+    ) -> dict:
+        """
+        Store a document (if not already stored) and return its handle.
+
+        Args:
+            name: Display name of the file.
+            data: File contents; a memoryview avoids an extra copy.
+            file_id: Uploader-assigned id; a repeat id returns the existing
+                handle without touching `data`.
+
+        Returns:
+            Handle dict with keys: name, doc_id (SHA-256 hex), path, size.
+        """
+        if file_id is not None:
+            handle = self.lookup(file_id, name)
+            if handle is not None:
+                return handle
+
+        view = memoryview(data)
+        doc_id = hashlib.sha256(view).hexdigest()
+        path = self.path_for(doc_id)
+
+        handle = {"name": name, "doc_id": doc_id, "path": path, "size": len(view)}
+        with self._lock:
+            if self._reuse(doc_id, file_id):
+                return handle
+
+        # Copy outside the lock so other sessions' lookups don't wait on disk;
+        # only the rename and bookkeeping happen under it
+        tmp_path = self._write_temp(view)
+        try:
+            with self._lock:
+                if self._reuse(doc_id, file_id):
+                    return handle  # Another session stored it meanwhile
+                os.replace(tmp_path, path)
+                tmp_path = None
+                self._docs[doc_id] = len(view)
+                self._total += len(view)
+                if file_id is not None:
+                    self._file_ids[file_id] = doc_id
+                self._evict()
+        finally:
+            if tmp_path is not None:
+                self._remove(tmp_path)
+        return handle
+
+    def register_upload(self, uploaded_file) -> dict:
+        """Register a Streamlit UploadedFile without reading it into a new bytes object."""
+        file_id = getattr(uploaded_file, "file_id", None)
+        if file_id is not None:
+            handle = self.lookup(file_id, uploaded_file.name)
+            if handle is not None:
+                return handle
+        return self.register(uploaded_file.name, uploaded_file.getbuffer(), file_id=file_id)
+
+    def lookup(self, file_id: str, name: str) -> Optional[dict]:
+        """Return the handle for an already-registered uploader file id, if any."""
+        with self._lock:
+            doc_id = self._file_ids.get(file_id)
+            if doc_id is None or doc_id not in self._docs:
+                return None
+            self._docs.move_to_end(doc_id)
+            return {
+                "name": name,
+                "doc_id": doc_id,
+                "path": self.path_for(doc_id),
+                "size": self._docs[doc_id],
+            }
+
+    def path_for(self, doc_id: str) -> str:
+        """Location of a document in the working directory."""
+        return os.path.join(self.upload_dir, f"{doc_id}.pdf")
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self._lock:
+            return doc_id in self._docs
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._total
+
+    # ── Internal helpers ──────────────────────────────────────────────────
+
+    def _load_existing(self) -> None:
+        """Seed the LRU from documents already in the directory, oldest first."""
+        try:
+            names = os.listdir(self.upload_dir)
+        except FileNotFoundError:
+            return
+
+        entries = []
+        for name in names:
+            path = os.path.join(self.upload_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            match = _DOC_NAME_RE.match(name)
+            if match:
+                entries.append((st.st_mtime, match.group(1), st.st_size))
+            elif name.endswith(".tmp") and time.time() - st.st_mtime > _STALE_TMP_SECONDS:
+                self._remove(path)
+
+        entries.sort()
+        with self._lock:
+            for _, doc_id, size in entries:
+                self._docs[doc_id] = size
+                self._total += size
+            self._evict()
+        if entries:
+            logger.info(
+                "Found %d stored upload(s), %d bytes", len(self._docs), self._total
+            )
+
+    def _reuse(self, doc_id: str, file_id: Optional[str]) -> bool:
+        # Caller holds self._lock; bumps an already-stored document
+        if doc_id not in self._docs:
+            return False
+        self._docs.move_to_end(doc_id)
+        self._touch(self.path_for(doc_id))
+        if file_id is not None:
+            self._file_ids[file_id] = doc_id
+        return True
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        # Keeps modification times in LRU order for the next startup
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _write_temp(self, view: memoryview) -> str:
+        """Copy `view` to a new temp file in the working directory; returns its path."""
+        os.makedirs(self.upload_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.upload_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                for offset in range(0, len(view), _COPY_CHUNK):
+                    fh.write(view[offset:offset + _COPY_CHUNK])
+        except BaseException:
+            self._remove(tmp_path)
+            raise
+        return tmp_path
+
+    def _evict(self) -> None:
+        # Caller holds self._lock; always keep the newest document
+        while self._total > self.max_bytes and len(self._docs) > 1:
+            doc_id, size = self._docs.popitem(last=False)
+            self._total -= size
+            self._remove(self.path_for(doc_id))
+            self._file_ids = {
+                fid: did for fid, did in self._file_ids.items() if did != doc_id
+            }
+            logger.info("Evicted upload %s (%d bytes)", doc_id[:12], size)
+
+
+_default_registry: Optional[UploadRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_upload_registry() -> UploadRegistry:
+    """Return the process-wide UploadRegistry instance."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = UploadRegistry()
+        return _default_registry
+
+
+def resolve_pdf_source(file_info: dict) -> dict:
+    """
+    Turn an uploaded_files entry into PDFParser.extract keyword arguments.
+
+    Registry handles resolve to their on-disk path (plus the known content
+    hash); headless {name, bytes} entries pass their bytes through.
+    """
+    if file_info.get("path"):
+        if not os.path.exists(file_info["path"]):
+            raise FileNotFoundError(
+                f"{file_info.get('name', 'Document')} is no longer available; re-upload it"
+            )
+        return {"file_path": file_info["path"], "content_hash": file_info.get("doc_id")}
+    return {"pdf_bytes": file_info.get("bytes", b"")}